@@ -1,4 +1,6 @@
 from collections import OrderedDict
+from functools import lru_cache
+import io
 import re
 import xml.etree.ElementTree as ET
 
@@ -14,6 +16,27 @@ for prefix, uri in NAMESPACES.items():
     ET.register_namespace(prefix, uri)
 
 
+_XMLNS_TAG_REGEX = re.compile(r'<[^>]* xmlns:[^>]*>')
+_XMLNS_REGEX = re.compile(r' xmlns:.+?=".+?"')
+
+
+_XMLNS_DECLARATION_REGEX = re.compile(r' xmlns:([^\s=]+)="([^"]*)"')
+
+
+def _strip_xmlns(match):
+    return _XMLNS_REGEX.sub('', match.group(0))
+
+
+# Same escaping as ElementTree's serializer
+def _escape_cdata(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _escape_attrib(text):
+    text = _escape_cdata(text).replace('"', '&quot;')
+    return text.replace('\r', '&#13;').replace('\n', '&#10;').replace('\t', '&#09;')
+
+
 class SLDConfig:
     GEOSERVER_POSTGIS = 'geoserver_postgis'
     GEOSERVER_SLD_INLINE_FEATURE = 'geoserver_inline'
@@ -41,12 +64,74 @@ class SLDConfig:
         self.zero_length_string_is_null = True
 
 
+@lru_cache(maxsize=None)
+def _slot_names(klass):
+    names = []
+    for base in klass.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        names += [slots] if isinstance(slots, str) else [name for name in slots if name != '__weakref__']
+    return tuple(names)
+
+
+@lru_cache(maxsize=None)
+def _builds_etree(klass):
+    # Whether the class builds its own etree() instead of being serialised by iterxml()
+    return klass.etree is not ElemAbstract.etree
+
+
 class ElemAbstract:
+    # Nodes are slotted and create their children and attrib containers on first use, since styles
+    # may consist of hundreds of thousands of them. Subclasses must declare __slots__ as well
+    # (mixins an empty one) or their instances get a __dict__ again.
+    __slots__ = ('text', '_children', '_attrib', '__weakref__')
+
+    NAMESPACES = NAMESPACES  # Shared by all the instances
+
+    # Attributes which only cache derived data. They are not pickled; _reset_caches() restores them.
+    _transient = ()
+
     def __init__(self):
         self.text = None
-        self.children = OrderedDict()
-        self.attrib = {}
-        self.NAMESPACES = NAMESPACES.copy()
+        self._children = None
+        self._attrib = None
+
+    @property
+    def children(self):
+        if self._children is None:
+            self._children = OrderedDict()
+        return self._children
+
+    @children.setter
+    def children(self, value):
+        self._children = value
+
+    @property
+    def attrib(self):
+        if self._attrib is None:
+            self._attrib = {}
+        return self._attrib
+
+    @attrib.setter
+    def attrib(self, value):
+        self._attrib = value
+
+    def _reset_caches(self):
+        pass
+
+    def __getstate__(self):
+        state = {}
+        for name in _slot_names(type(self)):
+            if name not in self._transient and hasattr(self, name):
+                state[name] = getattr(self, name)
+        for name, value in getattr(self, '__dict__', {}).items():
+            if name not in self._transient:
+                state[name] = value
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._reset_caches()
 
     def validate(self):
         pass
@@ -57,10 +142,10 @@ class ElemAbstract:
 
     def etree(self, config=None):
         uri = self.NAMESPACES[self.nameSpace]
-        elem = ET.Element(f"{{{uri}}}{self.tagName}", attrib=self.attrib)
+        elem = ET.Element(f"{{{uri}}}{self.tagName}", attrib=self._attrib or {})
 
-        if self.children:
-            for child in self.children.values():
+        if self._children:
+            for child in self._children.values():
                 elem.append(child.etree(config))
         elif self.text:
             elem.text = self.text
@@ -71,22 +156,97 @@ class ElemAbstract:
         self.validate()
         xml = ET.tostring(self.etree(config), encoding='utf-8').decode()
         if no_xmlns:
-            inside_tag = False
-            xml2 = ''
-            buffer = ''
-            for c in xml:
-                if c == '<':
-                    inside_tag = True
-                    buffer = ''
-                    xml2 += c
-                elif c == '>':
-                    inside_tag = False
-                    xml2 += re.sub(r' xmlns:.+?=".+?"', '', buffer)
-                    xml2 += c
-                else:
-                    if inside_tag:
-                        buffer += c
-                    else:
-                        xml2 += c
-            xml = xml2
+            xml = _XMLNS_TAG_REGEX.sub(_strip_xmlns, xml)
         return xml
+
+    def _xml_namespaces(self, namespaces, config=None):
+        # Collects the namespaces declared by the root element
+        if _builds_etree(type(self)):
+            namespaces.update(self._xml_prefixes(config))
+            return
+
+        namespaces[self.nameSpace] = self.NAMESPACES[self.nameSpace]
+        if self._children:
+            for child in self._children.values():
+                child._xml_namespaces(namespaces, config)
+
+    def _xml_prefixes(self, config=None):
+        # Namespaces of the elements of subclasses which build their own etree() (e.g. GML geometries),
+        # which iterxml() declares on the root element. Subclasses may know them without building it.
+        prefixes = {uri: prefix for prefix, uri in self.NAMESPACES.items()}
+        namespaces = {}
+        for node in self.etree(config).iter():
+            for name in [node.tag, *node.attrib]:
+                if isinstance(name, str) and name.startswith('{'):
+                    uri = name[1:].partition('}')[0]
+                    if uri in prefixes:
+                        namespaces[prefixes[uri]] = uri
+        return namespaces
+
+    def _etree_xml(self, config=None):
+        return ET.tostring(self.etree(config), encoding='utf-8').decode()
+
+    def _foreign_xml(self, namespaces, no_xmlns, config=None):
+        # Serialises an element which builds its own etree(). The namespaces declared by the root
+        # element are removed from it, the others (if any) are kept unless no_xmlns.
+        xml = self._etree_xml(config)
+        mobj = _XMLNS_TAG_REGEX.match(xml)
+        if not mobj:
+            return xml
+
+        def declaration(match):
+            prefix, uri = match.groups()
+            return '' if no_xmlns or namespaces.get(prefix) == uri else match.group(0)
+        return _XMLNS_DECLARATION_REGEX.sub(declaration, mobj.group(0)) + xml[mobj.end():]
+
+    def iterxml(self, no_xmlns=False, config=None, chunk_size=65536):
+        # Yields the same document as xml() in chunks of about chunk_size characters, without
+        # building an ElementTree of the whole document. Elements which build their own etree()
+        # are serialised when they are reached.
+        self.validate()
+        namespaces = {}
+        self._xml_namespaces(namespaces, config)
+
+        xmlns = ''
+        if not no_xmlns:
+            xmlns = ''.join(f' xmlns:{prefix}="{_escape_attrib(uri)}"' for prefix, uri in sorted(namespaces.items()))
+
+        buffer = []
+        size = 0
+        stack = [(self, xmlns)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                buffer.append(item)
+            elif _builds_etree(type(item[0])):
+                buffer.append(item[0]._foreign_xml(namespaces, no_xmlns, config))
+            else:
+                elem, xmlns = item
+                tag = f'{elem.nameSpace}:{elem.tagName}'
+                attrib = ''
+                if elem._attrib:
+                    attrib = ''.join(f' {key}="{_escape_attrib(value)}"' for key, value in elem._attrib.items())
+                if elem._children:
+                    buffer.append(f'<{tag}{xmlns}{attrib}>')
+                    stack.append(f'</{tag}>')
+                    stack.extend((child, '') for child in reversed(list(elem._children.values())))
+                elif elem.text:
+                    buffer.append(f'<{tag}{xmlns}{attrib}>{_escape_cdata(elem.text)}</{tag}>')
+                else:
+                    buffer.append(f'<{tag}{xmlns}{attrib} />')
+
+            size += len(buffer[-1])
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+
+        if buffer:
+            yield ''.join(buffer)
+
+    def write_xml(self, fileobj, no_xmlns=False, config=None):
+        # Text streams receive str, anything else (files opened in binary mode, socket.makefile('wb'),
+        # io.BytesIO, ...) receives UTF-8 encoded bytes.
+        text = isinstance(fileobj, io.TextIOBase)
+        for chunk in self.iterxml(no_xmlns, config):
+            fileobj.write(chunk if text else chunk.encode('utf-8'))
@@ -1,25 +1,54 @@
+from functools import lru_cache
 import re
 
-from .base import ElemAbstract, ET, NAMESPACES
+from .base import ElemAbstract, ET, NAMESPACES, SLDConfig
+
+
+@lru_cache(maxsize=None)
+def _gdal_available():
+    try:
+        from .osgeo import utils
+    except ImportError:
+        return False
+    return True
 
 
 class Geometry(ElemAbstract):
+    __slots__ = ('source', '_ogr', '_etree', '_xml')
+    _transient = ('_ogr', '_etree', '_xml')
+
     def __init__(self, source):
-        self.source = None
+        # The source is only converted when the geometry is simulated or serialised for the first time
+        self.source = source
+        self._reset_caches()
+
+    def _reset_caches(self):
         self._ogr = None
-        self._etree = None
+        self._etree = {}  # GML version -> element
+        self._xml = {}  # GML version -> serialised element
 
-        gdal_available = False
+    def __getstate__(self):
+        state = super().__getstate__()
+        if type(self.source).__module__.startswith('osgeo.'):
+            # SWIG objects (e.g. ogr.Geometry) cannot be pickled but OgrWrapper can
+            state['source'] = self.ogr
+        return state
+
+    def structure_key(self):
         try:
+            hash(self.source)
+        except TypeError:
+            return (type(self), id(self))  # e.g. GeoJSON dicts
+        return (type(self), self.source)
+
+    @property
+    def ogr(self):
+        if self._ogr is None:
+            if not _gdal_available():
+                raise ImportError('To simulate GML geometry, GDAL Python binding is needed to be installed.')
             from .osgeo.utils import OgrWrapper
-        except ImportError:
-            pass
-        else:
-            gdal_available = True
-            self._ogr = OgrWrapper(source)
-            return
-        root = self._parse_gml(source)
-        self._etree = root
+            self._ogr = OgrWrapper.wrap(self.source)
+        return self._ogr
 
     @classmethod
     def wrap(klass, obj):
@@ -64,13 +93,53 @@ class Geometry(ElemAbstract):
             raise ValueError(f'Argument is not GML Geometry: {repr(source_original)}')
         return root
 
+    @staticmethod
+    def _gml_version(config):
+        # SLD 1.1 (Symbology Encoding) documents use GML 3, SLD 1.0 documents GML 2
+        if config is not None and config.sld_ver == SLDConfig.SLD2:
+            return 3
+        return 2
+
+    @staticmethod
+    def _source_gml_version(root):
+        # GML 2 elements which GML 3 replaced (gml:coordinates is only deprecated, but OGR exports gml:pos)
+        GML = NAMESPACES["gml"]
+        for tag in ['coordinates', 'coord', 'outerBoundaryIs', 'innerBoundaryIs']:
+            if root.find(f'.//{{{GML}}}{tag}') is not None:
+                return 2
+        return 3
+
     def etree(self, config=None):
-        if self._etree:
-            return self._etree
-        gml = self._ogr.gml2
-        return self._parse_gml(gml)
+        version = self._gml_version(config)
+        if version not in self._etree:
+            self._etree[version] = self._build_etree(version)
+        return self._etree[version]
+
+    def _build_etree(self, version):
+        # GML sources (e.g. loaded from a document) are serialised as they are, unless they are of
+        # the other GML version or OGR has been used, through which the geometry may have been modified
+        if not _gdal_available():
+            return self._parse_gml(self.source)  # Cannot be converted without GDAL
+
+        if self._ogr is None and isinstance(self.source, (str, ET.Element)):
+            try:
+                root = self._parse_gml(self.source)
+            except ValueError:
+                pass  # e.g. WKT
+            else:
+                if self._source_gml_version(root) == version:
+                    return root
+        return self._parse_gml(self.ogr.gml3 if version == 3 else self.ogr.gml2)
+
+    def _xml_prefixes(self, config=None):
+        # Known without converting the source (see iterxml())
+        return {'gml': self.NAMESPACES['gml']}
+
+    def _etree_xml(self, config=None):
+        version = self._gml_version(config)
+        if version not in self._xml:
+            self._xml[version] = super()._etree_xml(config)
+        return self._xml[version]
 
     def simulate(self, *args, **kwargs):
-        if self._ogr:
-            return self._ogr
-        raise ImportError('To simulate GML geometry, GDAL Python binding is needed to be installed.')
+        return self.ogr
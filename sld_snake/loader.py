@@ -0,0 +1,225 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+
+from .base import NAMESPACES
+from .ogc import (
+    Literal, PropertyName, Add, Sub, Mul, Div,
+    PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsGreaterThan, PropertyIsGreaterThanOrEqualTo,
+    PropertyIsLessThan, PropertyIsLessThanOrEqualTo, PropertyIsBetween, PropertyIsLike, PropertyIsNull,
+    Equals, Disjoint, Touches, Within, Overlaps, Crosses, Intersects, Contains,
+)
+from .ogc.base import Expression
+from .ogc.logic_ops import LogicOpAbstract, And, Or, Not
+
+
+OGC = NAMESPACES['ogc']
+GML = NAMESPACES['gml']
+FILTER = f'{{{OGC}}}Filter'
+
+
+def _tag(elem):
+    return elem.tag.split('}', 1)[-1]
+
+
+def _expect(elem, children, klass, count):
+    if len(children) != count or not all(isinstance(child, klass) for child in children):
+        raise ValueError(f'{_tag(elem)} must have {count} {klass.__name__} element(s): {repr(children)}')
+    return children
+
+
+def _build_filter(elem, children):
+    return _expect(elem, children, LogicOpAbstract, 1)[0]
+
+
+def _build_literal(elem, children):
+    if children:
+        raise ValueError(f'Literal must not have child elements: {repr(children)}')
+    return Literal(elem.text or '')
+
+
+def _build_property_name(elem, children):
+    if children:
+        raise ValueError(f'PropertyName must not have child elements: {repr(children)}')
+    return PropertyName((elem.text or '').strip())
+
+
+def _build_boundary(elem, children):
+    return _expect(elem, children, Expression, 1)[0]
+
+
+def _build_binary(klass):
+    def build(elem, children):
+        return klass(*_expect(elem, children, Expression, 2))
+    return build
+
+
+def _build_comparison(klass):
+    def build(elem, children):
+        return klass(*_expect(elem, children, Expression, 2), matchCase=elem.get('matchCase'))
+    return build
+
+
+def _build_between(elem, children):
+    # The boundaries have already been unwrapped into plain expressions by _build_boundary()
+    return PropertyIsBetween(*_expect(elem, children, Expression, 3))
+
+
+def _build_like(elem, children):
+    if len(children) != 2 or type(children[0]) != PropertyName or type(children[1]) != Literal:
+        raise ValueError(f'PropertyIsLike must have PropertyName and Literal elements: {repr(children)}')
+    return PropertyIsLike(
+        children[0], children[1],
+        wildCard=elem.get('wildCard', '%'),
+        singleChar=elem.get('singleChar', '_'),
+        escapeChar=elem.get('escapeChar', elem.get('escape', '\\')),  # 'escape' in Filter Encoding 1.0
+        matchCase=elem.get('matchCase'),
+    )
+
+
+def _build_null(elem, children):
+    return PropertyIsNull(*_expect(elem, children, PropertyName, 1))
+
+
+def _build_logic(klass):
+    def build(elem, children):
+        if not all(isinstance(child, LogicOpAbstract) for child in children):
+            raise ValueError(f'{_tag(elem)} must only have conditions: {repr(children)}')
+        try:
+            return klass(*children)
+        except TypeError:
+            raise ValueError(f'{_tag(elem)} has a wrong number of conditions: {repr(children)}')
+    return build
+
+
+def _build_spatial(klass):
+    def build(elem, children):
+        if len(children) != 2 or type(children[0]) != PropertyName:
+            raise ValueError(f'{_tag(elem)} must have PropertyName and geometry elements: {repr(children)}')
+        geometry = children[1]
+        if type(geometry) != PropertyName:
+            tag = [child.tag for child in elem if isinstance(child.tag, str)][1]
+            if not tag.startswith(f'{{{GML}}}'):
+                raise ValueError(f'Unsupported element: {tag}')
+            geometry = _tostring(geometry)
+        return klass(children[0], geometry)
+    return build
+
+
+def _tostring(elem):
+    if isinstance(elem, ET.Element):
+        return ET.tostring(elem, encoding='unicode')
+
+    from lxml import etree
+    return etree.tostring(elem, encoding='unicode')
+
+
+BUILDERS = {
+    FILTER: _build_filter,
+    f'{{{OGC}}}Literal': _build_literal,
+    f'{{{OGC}}}PropertyName': _build_property_name,
+    f'{{{OGC}}}Add': _build_binary(Add),
+    f'{{{OGC}}}Sub': _build_binary(Sub),
+    f'{{{OGC}}}Mul': _build_binary(Mul),
+    f'{{{OGC}}}Div': _build_binary(Div),
+    f'{{{OGC}}}PropertyIsEqualTo': _build_comparison(PropertyIsEqualTo),
+    f'{{{OGC}}}PropertyIsNotEqualTo': _build_comparison(PropertyIsNotEqualTo),
+    f'{{{OGC}}}PropertyIsGreaterThan': _build_comparison(PropertyIsGreaterThan),
+    f'{{{OGC}}}PropertyIsGreaterThanOrEqualTo': _build_comparison(PropertyIsGreaterThanOrEqualTo),
+    f'{{{OGC}}}PropertyIsLessThan': _build_comparison(PropertyIsLessThan),
+    f'{{{OGC}}}PropertyIsLessThanOrEqualTo': _build_comparison(PropertyIsLessThanOrEqualTo),
+    f'{{{OGC}}}PropertyIsBetween': _build_between,
+    f'{{{OGC}}}LowerBoundary': _build_boundary,
+    f'{{{OGC}}}UpperBoundary': _build_boundary,
+    f'{{{OGC}}}PropertyIsLike': _build_like,
+    f'{{{OGC}}}PropertyIsNull': _build_null,
+    f'{{{OGC}}}And': _build_logic(And),
+    f'{{{OGC}}}Or': _build_logic(Or),
+    f'{{{OGC}}}Not': _build_logic(Not),
+    f'{{{OGC}}}Equals': _build_spatial(Equals),
+    f'{{{OGC}}}Disjoint': _build_spatial(Disjoint),
+    f'{{{OGC}}}Touches': _build_spatial(Touches),
+    f'{{{OGC}}}Within': _build_spatial(Within),
+    f'{{{OGC}}}Overlaps': _build_spatial(Overlaps),
+    f'{{{OGC}}}Crosses': _build_spatial(Crosses),
+    f'{{{OGC}}}Intersects': _build_spatial(Intersects),
+    f'{{{OGC}}}Contains': _build_spatial(Contains),
+}
+
+
+def _builder(elem):
+    if elem.tag.startswith(f'{{{GML}}}'):
+        # GML is handed over to Geometry as it is
+        return lambda elem, children: elem
+
+    try:
+        return BUILDERS[elem.tag]
+    except KeyError:
+        raise ValueError(f'Unsupported element: {elem.tag}')
+
+
+def _build_tree(elem):
+    builder = _builder(elem)
+    return builder(elem, [_build_tree(child) for child in elem if isinstance(child.tag, str)])
+
+
+def _open(source):
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str) and source.lstrip().startswith('<'):
+        return io.BytesIO(source.encode('utf-8'))
+    if isinstance(source, os.PathLike):
+        return os.fspath(source)
+    return source  # file name or file object
+
+
+def _iterparse(source):
+    try:
+        from lxml import etree
+    except ImportError:
+        return ET.iterparse(_open(source), events=('start', 'end'))
+    return etree.iterparse(_open(source), events=('start', 'end'))
+
+
+def _iter_objects(source, filters_only):
+    # Objects are built bottom-up on 'end' events. Elements outside ogc:Filter are discarded as soon
+    # as they are closed, so that memory use doesn't grow with the size of the document.
+    stack = []  # (builder, built children) for each open element; builder is None outside filters
+    for event, elem in _iterparse(source):
+        if event == 'start':
+            builder = None
+            if (stack and stack[-1][0]) or elem.tag == FILTER or not (filters_only or stack):
+                builder = _builder(elem)
+            stack.append((builder, []))
+            continue
+
+        builder, children = stack.pop()
+        if builder:
+            obj = builder(elem, children)
+            if stack and stack[-1][0]:
+                stack[-1][1].append(obj)
+                continue
+            yield obj
+
+        elem.clear()
+        if hasattr(elem, 'getprevious'):
+            # lxml keeps the closed siblings in the parent
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+
+def from_xml(source):
+    # Loads a single ogc:Filter (returning its condition) or a filter element such as ogc:And or
+    # ogc:PropertyIsEqualTo. source is XML text (str or bytes), a file name, a file object or an element.
+    if hasattr(source, 'tag') and hasattr(source, 'iter'):
+        return _build_tree(source)
+    return next(_iter_objects(source, filters_only=False))
+
+
+def iter_filters(source):
+    # Yields the condition of every ogc:Filter in a document (e.g. a whole SLD) in document order
+    if hasattr(source, 'tag') and hasattr(source, 'iter'):
+        for elem in source.iter(FILTER):
+            yield _build_tree(elem)
+        return
+    yield from _iter_objects(source, filters_only=True)
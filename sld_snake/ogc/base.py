@@ -2,6 +2,7 @@ from collections import OrderedDict
 import datetime
 from itertools import product
 import re
+from weakref import WeakValueDictionary
 
 from ..base import ElemAbstract
 from ..utils import stringify, parseDouble, parseDate
@@ -14,8 +15,79 @@ OGC = 'http://www.opengis.net/ogc'
 
 
 class OgcAbstract(ElemAbstract):
+    __slots__ = ()
+
     nameSpace = 'ogc'
 
+    def structure_key(self):
+        # Hashable description of the subtree. Subtrees with equal keys are serialised and evaluated
+        # identically, so the key can be used to find and deduplicate repeated subtrees. It is computed
+        # on every call since nodes are mutable.
+        attrib = tuple(sorted(self._attrib.items())) if self._attrib else ()
+        children = ()
+        if self._children:
+            children = tuple((key, child.structure_key()) for key, child in self._children.items())
+        return (type(self), self.text, attrib, children)
+
+    def share_expressions(self):
+        # Replaces the Literal and PropertyName nodes in the subtree with shared instances
+        # (see Expression.shared()) and returns self
+        if self._children:
+            for key, child in list(self._children.items()):
+                if isinstance(child, (Literal, PropertyName)):
+                    self._children[key] = child.shared(child.text)
+                elif isinstance(child, OgcAbstract):
+                    child.share_expressions()
+        return self
+
+    def compile(self):
+        # Lowers the element into a callable f(data, config=None) which returns the same value as
+        # simulate(data, config). Subclasses override this to flatten their subtree into closures
+        # so that evaluating a filter against many features does not walk the tree every time.
+        return self.simulate
+
+    # Batch evaluation works on columnar data: a dict mapping property names to NumPy arrays (or
+    # sequences) of equal length. NumPy is only imported when one of these methods is used.
+    @staticmethod
+    def _batch_column(column):
+        import numpy as np
+
+        if isinstance(column, np.ndarray):
+            return column
+        array = np.empty(len(column), dtype=object)
+        for i, val in enumerate(column):
+            array[i] = val
+        return array
+
+    @staticmethod
+    def _batch_length(columns):
+        if not columns:
+            raise ValueError('columns must have at least one column')
+
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError('All columns must have the same length')
+        return lengths.pop()
+
+    @classmethod
+    def _batch_take(klass, columns, indices):
+        return {key: klass._batch_column(column)[indices] for key, column in columns.items()}
+
+    @classmethod
+    def _batch_rows(klass, columns):
+        keys = list(columns.keys())
+        values = [klass._batch_column(columns[key]).tolist() for key in keys]
+        for row in zip(*values):
+            yield dict(zip(keys, row))
+
+    def simulate_batch(self, columns, config=None):
+        # Fallback for elements without a vectorised implementation: evaluate the compiled
+        # element feature by feature.
+        import numpy as np
+
+        func = self.compile()
+        return np.array([func(row, config) for row in self._batch_rows(columns)])
+
     class UnsupportedDataType(Exception):
         pass
 
@@ -27,11 +99,32 @@ class OgcAbstract(ElemAbstract):
 
 
 class Expression(OgcAbstract):
+    __slots__ = ()
+
+    # (class, text) -> instance, for shared()
+    _shared = WeakValueDictionary()
+
     class NonNumericError(Exception):
         pass
-        
-    def __init__(self):
-        super().__init__()
+
+    @classmethod
+    def _text(klass, obj):
+        # Text of the instance built from obj, see shared()
+        raise TypeError(f'{klass.__name__} cannot be shared')
+
+    @classmethod
+    def shared(klass, obj):
+        # Returns the instance shared by every caller asking for an equal Literal or PropertyName.
+        # Shared instances are frozen (see _SharedExpression): their text cannot be changed, as it
+        # belongs to every filter using them.
+        klass = getattr(klass, '_plain_class', klass)
+        key = (klass, klass._text(obj))
+        node = klass._shared.get(key)
+        if node is None:
+            node = klass(obj)
+            node.__class__ = klass._shared_class
+            node = klass._shared.setdefault(key, node)
+        return node
 
     @classmethod
     def wrap(klass, obj):
@@ -75,6 +168,8 @@ class Expression(OgcAbstract):
 
 
 class Literal(Expression):
+    __slots__ = ()
+
     class CannotCastError(Exception):
         pass
 
@@ -82,18 +177,36 @@ class Literal(Expression):
         super().__init__()
         self.text = stringify(obj)
 
+    @classmethod
+    def _text(klass, obj):
+        return stringify(obj)
+
     def simulate(self, *args, **kwargs):
         return self.text
 
+    def simulate_batch(self, columns, config=None):
+        return self.text
+
+    def compile(self):
+        text = self.text
+
+        def simulate(data=None, config=None):
+            return text
+        return simulate
+
 
 class PropertyName(Expression):
+    __slots__ = ()
+
     def __init__(self, property_name):
         super().__init__()
+        self.text = self._text(property_name)
 
+    @classmethod
+    def _text(klass, property_name):
         if not isinstance(property_name, str):
             raise TypeError('property_name must be string!')
-
-        self.text = property_name
+        return property_name
 
     def simulate(self, data, config=None):
         if not isinstance(data, (dict, OrderedDict)):
@@ -104,4 +217,67 @@ class PropertyName(Expression):
 
         return data[self.text]
 
+    def simulate_batch(self, columns, config=None):
+        if not isinstance(columns, (dict, OrderedDict)):
+            raise TypeError('columns must be dict or collections.OrderedDict instance.')
+
+        if self.text not in columns:
+            raise ValueError(f'columns doesn\'t have key "{self.text}"')
+
+        return self._batch_column(columns[self.text])
+
+    def compile(self):
+        name = self.text
+
+        def simulate(data, config=None):
+            if not isinstance(data, (dict, OrderedDict)):
+                raise TypeError('data must be dict or collections.OrderedDict instance.')
+            try:
+                return data[name]
+            except KeyError:
+                raise ValueError(f'data doesn\'t have key "{name}"')
+        return simulate
+
+
+_text_slot = ElemAbstract.text
+
+
+class _SharedExpression:
+    # Mixin of the classes of the instances returned by Expression.shared(), which behave like
+    # their _plain_class except that their text cannot be changed. Plain instances keep the
+    # faster text slot.
+    __slots__ = ()
+
+    @property
+    def text(self):
+        return _text_slot.__get__(self)
+
+    @text.setter
+    def text(self, value):
+        raise AttributeError(f'The text of shared {self.tagName} {repr(self.text)} cannot be changed')
+
+    @property
+    def tagName(self):
+        return self._plain_class.__name__
+
+    def structure_key(self):
+        return (self._plain_class,) + super().structure_key()[1:]
+
+    def __setstate__(self, state):
+        state = dict(state)
+        _text_slot.__set__(self, state.pop('text'))
+        super().__setstate__(state)
+
+
+class _SharedLiteral(_SharedExpression, Literal):
+    __slots__ = ()
+    _plain_class = Literal
+
+
+class _SharedPropertyName(_SharedExpression, PropertyName):
+    __slots__ = ()
+    _plain_class = PropertyName
+
 
+Literal._shared_class = _SharedLiteral
+PropertyName._shared_class = _SharedPropertyName
@@ -1,11 +1,12 @@
+from ..utils import parseDouble, parseDoubleArray
 
-from ..utils import parseDouble
-
-from .base import Expression
+from .base import Expression, Literal
 from .mixins import TwoExpressionMixin
 
 
 class BinaryOperator(Expression, TwoExpressionMixin):
+    __slots__ = ()
+
     # expr0 - from TwoExpressionMixin
     # expr1 - from TwoExpressionMixin
 
@@ -19,26 +20,104 @@ class BinaryOperator(Expression, TwoExpressionMixin):
         val1 = parseDouble(self.expr1.simulate(*args, **kwargs))
         return val0, val1
 
+    def simulate_batch(self, columns, config=None):
+        val0 = parseDoubleArray(self.expr0.simulate_batch(columns, config))
+        val1 = parseDoubleArray(self.expr1.simulate_batch(columns, config))
+        return val0, val1
+
+    @staticmethod
+    def _compile_operand(expr):
+        # Numeric literals are parsed once here instead of on every evaluation. Literals which
+        # cannot be parsed are left to fail at evaluation time, like simulate() does.
+        if isinstance(expr, Literal):
+            try:
+                number = parseDouble(expr.text)
+            except (ValueError, TypeError):
+                pass
+            else:
+                def simulate(data=None, config=None):
+                    return number
+                return simulate
+
+        func = expr.compile()
+
+        def simulate(data, config=None):
+            return parseDouble(func(data, config))
+        return simulate
+
+    def compile(self):
+        return self._compile_operand(self.expr0), self._compile_operand(self.expr1)
+
 
 class Add(BinaryOperator):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         val0, val1 = super().simulate(*args, **kwargs)
         return val0 + val1
 
+    def simulate_batch(self, columns, config=None):
+        import numpy as np
+
+        val0, val1 = super().simulate_batch(columns, config)
+        with np.errstate(invalid='ignore', over='ignore'):
+            return val0 + val1
+
+    def compile(self):
+        func0, func1 = super().compile()
+
+        def simulate(data, config=None):
+            return func0(data, config) + func1(data, config)
+        return simulate
+
 
 class Sub(BinaryOperator):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         val0, val1 = super().simulate(*args, **kwargs)
         return val0 - val1
 
+    def simulate_batch(self, columns, config=None):
+        import numpy as np
+
+        val0, val1 = super().simulate_batch(columns, config)
+        with np.errstate(invalid='ignore', over='ignore'):
+            return val0 - val1
+
+    def compile(self):
+        func0, func1 = super().compile()
+
+        def simulate(data, config=None):
+            return func0(data, config) - func1(data, config)
+        return simulate
+
 
 class Mul(BinaryOperator):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         val0, val1 = super().simulate(*args, **kwargs)
         return val0 * val1
 
+    def simulate_batch(self, columns, config=None):
+        import numpy as np
+
+        val0, val1 = super().simulate_batch(columns, config)
+        with np.errstate(invalid='ignore', over='ignore'):
+            return val0 * val1
+
+    def compile(self):
+        func0, func1 = super().compile()
+
+        def simulate(data, config=None):
+            return func0(data, config) * func1(data, config)
+        return simulate
+
 
 class Div(BinaryOperator):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         val0, val1 = super().simulate(*args, **kwargs)
 
@@ -46,3 +125,24 @@ class Div(BinaryOperator):
             return val0 / val1
         except ZeroDivisionError:
             return float('inf')
+
+    def simulate_batch(self, columns, config=None):
+        import numpy as np
+
+        val0, val1 = super().simulate_batch(columns, config)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = np.true_divide(val0, val1)
+        # Any division by zero (including 0 / 0 and NaN / 0) is infinity, as in simulate()
+        return np.where(val1 == 0, float('inf'), result)
+
+    def compile(self):
+        func0, func1 = super().compile()
+
+        def simulate(data, config=None):
+            val0 = func0(data, config)
+            val1 = func1(data, config)
+            try:
+                return val0 / val1
+            except ZeroDivisionError:
+                return float('inf')
+        return simulate
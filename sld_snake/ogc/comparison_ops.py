@@ -1,4 +1,4 @@
-from ..utils import stringify, parseDouble, parseBool, parseDate
+from ..utils import stringify, parseDouble, tryParseDouble, parseBool, parseDate
 from .base import OgcAbstract, Expression, PropertyName, Literal
 from .logic_ops import LogicOpAbstract
 from .mixins import OneExpressionMixin, TwoExpressionMixin, PropertyNameMixin, MatchCaseMixin, OneExpressionOverloading
@@ -7,10 +7,12 @@ import re
 
 
 class ComparisonOps(LogicOpAbstract):
-    pass
+    __slots__ = ()
 
 
 class BinaryComparisonOp(ComparisonOps, TwoExpressionMixin, MatchCaseMixin):
+    __slots__ = ()
+
     def __init__(self, expr0, expr1, matchCase=None):
         super().__init__()
 
@@ -46,76 +48,292 @@ class BinaryComparisonOp(ComparisonOps, TwoExpressionMixin, MatchCaseMixin):
             return 1
         return -1  # val1 < val2
 
+    @staticmethod
+    def _coerce_values(val1, val2):
+        # Both values are classified once: numbers first, then dates, booleans and strings.
+        # tryParseDouble() does not raise, so non-numeric values cost no exception handling.
+        num1 = tryParseDouble(val1)
+        if num1 is not None:
+            num2 = tryParseDouble(val2)
+            if num2 is not None:
+                return num1, num2
+            # val1 stays parsed when only val2 is not a number
+            val1 = num1
+
+        if type(val1) != type(val2):
+            if type(val1) in (datetime.datetime, datetime.date) or type(val2) in (datetime.datetime, datetime.date):
+                val1 = parseDate(val1)
+                val2 = parseDate(val2)
+
+            elif type(val1) == bool:
+                val1 = int(val1)
+                if type(val2) == str:
+                    val2 = { 'true': 1, 'false': 0 }.get(val2.lower(), val2)
+                if type(val2) in (int, bool):
+                    val2 = int(val2)
+                else:
+                    val2 = int(parseDouble(val2))
+
+            elif type(val2) == bool:
+                val2 = int(val2)
+                if type(val1) == str:
+                    val1 = { 'true': 1, 'false': 0 }.get(val1.lower(), val1)
+                if type(val1) in (int, bool):
+                    val1 = int(val1)
+                else:
+                    val1 = int(parseDouble(val1))
+
+        if type(val1) != type(val2):
+            val1 = stringify(val1)
+            val2 = stringify(val2)
+
+        return val1, val2
+
     def simulate(self, *args, **kwargs):
         val1 = self.expr0.simulate(*args, **kwargs)
         val2 = self.expr1.simulate(*args, **kwargs)
+        return self._compare_values(*self._coerce_values(val1, val2))
 
+    @staticmethod
+    def _batch_numbers(val):
+        # Returns the operand as floats if it can be compared numerically as a whole, otherwise None
+        import numpy as np
+
+        if isinstance(val, np.ndarray):
+            if val.dtype.kind in 'iuf':
+                return val.astype(float)
+            return None
         try:
-            val1 = parseDouble(val1)
-            val2 = parseDouble(val2)
+            return parseDouble(val)
         except (ValueError, TypeError):
-            if type(val1) != type(val2):
-                if type(val1) in (datetime.datetime, datetime.date) or type(val2) in (datetime.datetime, datetime.date):
-                    val1 = parseDate(val1)
-                    val2 = parseDate(val2)
+            return None
+
+    def simulate_batch(self, columns, config=None):
+        import numpy as np
+
+        length = self._batch_length(columns)
+        val1 = self.expr0.simulate_batch(columns, config)
+        val2 = self.expr1.simulate_batch(columns, config)
+
+        num1 = self._batch_numbers(val1)
+        num2 = self._batch_numbers(val2)
+        if num1 is not None and num2 is not None:
+            # Same as _compare_values() on floats: NaN compares as -1 to anything
+            result = np.where(num1 == num2, 0, np.where(num1 > num2, 1, -1))
+            return np.broadcast_to(result, (length,)).copy()
+
+        def values(val):
+            if isinstance(val, np.ndarray):
+                return np.broadcast_to(val, (length,)).tolist()
+            return [val] * length
+
+        coerce = self._coerce_values
+        compare = self._compare_values
+        return np.array([compare(*coerce(v1, v2)) for v1, v2 in zip(values(val1), values(val2))], dtype=int)
+
+    def compile(self):
+        coerce = self._coerce_values
+        compare = self._compare_values
+        func0 = self.expr0.compile()
+        func1 = self.expr1.compile()
+
+        # A Literal on one side is parsed once, so that numeric features skip coercion entirely.
+        # Literals always simulate to strings, hence anything else goes through _coerce_values.
+        if isinstance(self.expr1, Literal) and not isinstance(self.expr0, Literal):
+            try:
+                number = parseDouble(self.expr1.text)
+            except (ValueError, TypeError):
+                pass
+            else:
+                text = self.expr1.text
+
+                def simulate(data, config=None):
+                    val1 = func0(data, config)
+                    if type(val1) in (int, float):
+                        return compare(float(val1), number)
+                    return compare(*coerce(val1, text))
+                return simulate
+
+        if isinstance(self.expr0, Literal) and not isinstance(self.expr1, Literal):
+            try:
+                number = parseDouble(self.expr0.text)
+            except (ValueError, TypeError):
+                pass
+            else:
+                text = self.expr0.text
 
-                elif type(val1) == bool:
-                    val1 = int(val1)
-                    if type(val2) == str:
-                        val2 = { 'true': 1, 'false': 0 }.get(val2.lower(), val2)
-                    if type(val2) in (int, bool):
-                        val2 = int(val2)
-                    else:
-                        val2 = int(parseDouble(val2))
-
-                elif type(val2) == bool:
-                    val2 = int(val2)
-                    if type(val1) == str:
-                        val1 = { 'true': 1, 'false': 0 }.get(val1.lower(), val1)
-                    if type(val1) in (int, bool):
-                        val1 = int(val1)
-                    else:
-                        val1 = int(parseDouble(val1))
+                def simulate(data, config=None):
+                    val2 = func1(data, config)
+                    if type(val2) in (int, float):
+                        return compare(number, float(val2))
+                    return compare(*coerce(text, val2))
+                return simulate
 
-            if type(val1) != type(val2):
-                val1 = stringify(val1)
-                val2 = stringify(val2)
+        def simulate(data, config=None):
+            return compare(*coerce(func0(data, config), func1(data, config)))
+        return simulate
 
-        return self._compare_values(val1, val2)
+    def _safe_properties(self):
+        # A property compared to a Literal: None, numbers and strings are compared as numbers or
+        # strings, only booleans and dates may fail to be coerced
+        for expr0, expr1 in ((self.expr0, self.expr1), (self.expr1, self.expr0)):
+            if isinstance(expr0, PropertyName) and isinstance(expr1, Literal) and type(expr1.text) == str:
+                return frozenset([expr0.text])
+        return None
 
 
 class PropertyIsEqualTo(BinaryComparisonOp):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         return super().simulate(*args, **kwargs) == 0
 
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config) == 0
+
+    def compile(self):
+        compare = super().compile()
+
+        def simulate(data, config=None):
+            return compare(data, config) == 0
+        return simulate
+
+
+class EqualityIndex:
+    # Finds which of many Literals a value is equal to, like PropertyIsEqualTo (see
+    # BinaryComparisonOp._coerce_values()), with hash lookups instead of one comparison each.
+    # Only None, numbers and strings can be looked up: booleans and dates are coerced depending on
+    # the Literal, and must be compared one by one.
+    def __init__(self):
+        self._numbers = {}  # parsed number -> items, NaN being equal to nothing
+        self._texts = {}  # text of non-numeric Literals -> items
+
+    @staticmethod
+    def equality_key(op):
+        # Returns (property name, Literal text) if op is PropertyIsEqualTo(PropertyName, Literal), otherwise None
+        if type(op) != PropertyIsEqualTo:
+            return None
+        expr0, expr1 = op.expr0, op.expr1
+        if not isinstance(expr0, PropertyName) or not isinstance(expr1, Literal) or type(expr1.text) != str:
+            return None
+        return expr0.text, expr1.text
+
+    @staticmethod
+    def indexable(value):
+        return value is None or type(value) in (int, float, str)
+
+    def add(self, text, item):
+        number = tryParseDouble(text)
+        if number is None:
+            self._texts.setdefault(text, []).append(item)
+        elif number == number:
+            self._numbers.setdefault(number, []).append(item)
+
+    def lookup(self, value):
+        # Returns the items of the Literals equal to value, which must be indexable(), in insertion
+        # order for each kind of Literal
+        number = tryParseDouble(value)
+        if number is None:
+            return self._texts.get(value, [])
+
+        # A number is compared to non-numeric Literals as a string
+        items = self._numbers.get(number, [])
+        if self._texts:
+            items = items + self._texts.get(stringify(number), [])
+        return items
+
 
 class PropertyIsNotEqualTo(BinaryComparisonOp):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         return super().simulate(*args, **kwargs) != 0
 
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config) != 0
+
+    def compile(self):
+        compare = super().compile()
+
+        def simulate(data, config=None):
+            return compare(data, config) != 0
+        return simulate
+
 class PropertyIsGreaterThan(BinaryComparisonOp):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         return super().simulate(*args, **kwargs) > 0
 
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config) > 0
+
+    def compile(self):
+        compare = super().compile()
+
+        def simulate(data, config=None):
+            return compare(data, config) > 0
+        return simulate
+
 
 class PropertyIsLessThan(BinaryComparisonOp):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         return super().simulate(*args, **kwargs) < 0
 
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config) < 0
+
+    def compile(self):
+        compare = super().compile()
+
+        def simulate(data, config=None):
+            return compare(data, config) < 0
+        return simulate
+
 
 class PropertyIsGreaterThanOrEqualTo(BinaryComparisonOp):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         return super().simulate(*args, **kwargs) >= 0
 
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config) >= 0
+
+    def compile(self):
+        compare = super().compile()
+
+        def simulate(data, config=None):
+            return compare(data, config) >= 0
+        return simulate
+
 
 class PropertyIsLessThanOrEqualTo(BinaryComparisonOp):
+    __slots__ = ()
+
     def simulate(self, *args, **kwargs):
         return super().simulate(*args, **kwargs) <= 0
 
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config) <= 0
+
+    def compile(self):
+        compare = super().compile()
+
+        def simulate(data, config=None):
+            return compare(data, config) <= 0
+        return simulate
+
 
 class PropertyIsLike(ComparisonOps, PropertyNameMixin, MatchCaseMixin):
+    __slots__ = ('_matcher_key', '_matcher')
+    _transient = ('_matcher_key', '_matcher')
+
     def __init__(self, propertyname, pattern, wildCard='%', singleChar='_', escapeChar='\\', matchCase=None):
         super().__init__()
+        self._reset_caches()
         self.propertyName = propertyname
         self.pattern = pattern
         self.wildCard = wildCard
@@ -169,6 +387,47 @@ class PropertyIsLike(ComparisonOps, PropertyNameMixin, MatchCaseMixin):
         regex = '^' + regex + '$'
         return regex
 
+    @classmethod
+    def _pattern_to_matcher(cls, pattern, wildCard, singleChar, escapeChar, matchCase):
+        regex = re.compile(cls._pattern_to_regex(pattern, wildCard, singleChar, escapeChar), 0 if matchCase else re.I)
+
+        def match(value):
+            return regex.match(value) is not None
+
+        # Patterns like 'abc', 'abc%', '%abc' and '%abc%' don't need the regex engine.
+        # Case-insensitive matching and multi-line values ('$' also matches before a trailing '\n') are left to it.
+        core = pattern.strip(wildCard)
+        if not matchCase or wildCard in core or singleChar in pattern or escapeChar in pattern:
+            return match
+
+        if pattern.startswith(wildCard) and pattern.endswith(wildCard):
+            check = lambda value: core in value
+        elif pattern.startswith(wildCard):
+            check = lambda value: value.endswith(core)
+        elif pattern.endswith(wildCard):
+            check = lambda value: value.startswith(core)
+        else:
+            check = core.__eq__
+
+        def match_simple(value):
+            if '\n' in value:
+                return match(value)
+            return check(value)
+        return match_simple
+
+    def _reset_caches(self):
+        self._matcher_key = None
+        self._matcher = None
+
+    @property
+    def matcher(self):
+        key = (self.pattern.text, self.wildCard, self.singleChar, self.escapeChar, self.matchCase)
+        if key != self._matcher_key:
+            self.validate()
+            self._matcher = self._pattern_to_matcher(*key)
+            self._matcher_key = key
+        return self._matcher
+
     def _validate_and_set(self, char, argname):
         if not isinstance(char, str):
             raise TypeError(f'You cannot set {repr(char)} to {argname}. It must be a single character (string).')
@@ -232,11 +491,15 @@ class PropertyIsLike(ComparisonOps, PropertyNameMixin, MatchCaseMixin):
         self.children['pattern'] = value
 
     def simulate(self, data, config=None):
-        flags = 0
-        if not self.matchCase:
-            flags = re.I
-        match = re.match(self.regex, stringify(self.propertyName.simulate(data, config)), flags)
-        return match is not None
+        return self.matcher(stringify(self.propertyName.simulate(data, config)))
+
+    def compile(self):
+        matcher = self.matcher
+        func = self.propertyName.compile()
+
+        def simulate(data, config=None):
+            return matcher(stringify(func(data, config)))
+        return simulate
 
 
 # Known problem: In GeoServer, PropertyIsNull is True for empty strings ('') when applied to inline features
@@ -244,6 +507,8 @@ class PropertyIsLike(ComparisonOps, PropertyNameMixin, MatchCaseMixin):
 # The behaviour for inline features is coded in GeoServer but the latter depends on how the source DB treats 
 # empty strings against SQL 'WHERE column IS NULL'
 class PropertyIsNull(ComparisonOps, PropertyNameMixin):
+    __slots__ = ()
+
     def __init__(self, propertyname):
         super().__init__()
         self.propertyName = propertyname
@@ -252,8 +517,22 @@ class PropertyIsNull(ComparisonOps, PropertyNameMixin):
         val = self.propertyName.simulate(data)
         return val is None
 
+    def compile(self):
+        func = self.propertyName.compile()
+
+        def simulate(data, config=None):
+            return func(data) is None
+        return simulate
+
+    def _safe_properties(self):
+        if isinstance(self.propertyName, PropertyName):
+            return frozenset()
+        return None
+
 
 class PropertyIsBetweenBoundary(OgcAbstract, OneExpressionMixin, OneExpressionOverloading):
+    __slots__ = ()
+
     def __init__(self, expr):
         super().__init__()
         self.expr0 = expr
@@ -261,31 +540,74 @@ class PropertyIsBetweenBoundary(OgcAbstract, OneExpressionMixin, OneExpressionOv
     def simulate(self, *args, **kwargs):
         return self.expr0.simulate(*args, **kwargs)
 
+    def simulate_batch(self, columns, config=None):
+        return self.expr0.simulate_batch(columns, config)
+
 
 class LowerBoundary(PropertyIsBetweenBoundary):
-    pass
+    __slots__ = ()
 
 class UpperBoundary(PropertyIsBetweenBoundary):
-    pass
+    __slots__ = ()
 
 
 class PropertyIsBetween(ComparisonOps, OneExpressionMixin):
+    __slots__ = ()
+
     def __init__(self, expr, lower_bounadry, upper_boundary):
         super().__init__()
         self.expr0 = expr
         self.lowerBoundary = lower_bounadry
         self.upperBoundary = upper_boundary
-        print(self.lowerBoundary)
-        
+
     def simulate(self, *args, **kwargs):
+        # Same as PropertyIsGreaterThanOrEqualTo(expr, lower) and PropertyIsLessThanOrEqualTo(expr, upper),
+        # with the tested expression evaluated once
+        coerce = BinaryComparisonOp._coerce_values
+        compare = BinaryComparisonOp._compare_values
+        val = self.expr0.simulate(*args, **kwargs)
+        return (
+            compare(*coerce(val, self.lowerBoundary.simulate(*args, **kwargs))) >= 0
+            and compare(*coerce(val, self.upperBoundary.simulate(*args, **kwargs))) <= 0
+        )
+
+    def simulate_batch(self, columns, config=None):
         test1 = PropertyIsGreaterThanOrEqualTo(self.expr0, self.lowerBoundary.expr0)
         test2 = PropertyIsLessThanOrEqualTo(self.expr0, self.upperBoundary.expr0)
+        return self._simulate_batch_all([test1, test2], columns, config)
+
+    def compile(self):
+        coerce = BinaryComparisonOp._coerce_values
+        compare = BinaryComparisonOp._compare_values
+        func0 = self.expr0.compile()
+        lower_expr = self.lowerBoundary.expr0
+        upper_expr = self.upperBoundary.expr0
+
+        # Numeric Literal boundaries are parsed once, so that numeric features skip coercion entirely.
+        # Like _compare_values(), a NaN value is not above the upper boundary.
+        if isinstance(lower_expr, Literal) and isinstance(upper_expr, Literal):
+            lower, upper = lower_expr.text, upper_expr.text
+            lower_number, upper_number = tryParseDouble(lower), tryParseDouble(upper)
+            if lower_number is not None and upper_number is not None:
+                def simulate(data, config=None):
+                    val = func0(data, config)
+                    if type(val) in (int, float):
+                        val = float(val)
+                        return val >= lower_number and not val > upper_number
+                    return compare(*coerce(val, lower)) >= 0 and compare(*coerce(val, upper)) <= 0
+                return simulate
+
+        lower_func = lower_expr.compile()
+        upper_func = upper_expr.compile()
+
+        def simulate(data, config=None):
+            val = func0(data, config)
+            return compare(*coerce(val, lower_func(data, config))) >= 0 and compare(*coerce(val, upper_func(data, config))) <= 0
+        return simulate
 
-        return test1.simulate(*args, **kwargs) and test2.simulate(*args, **kwargs)
-        
     def _set_boundary(self, expr, klass):
         if isinstance(expr, klass):
-            self.children[klass] = obj
+            self.children[klass] = expr
         else:
             self.children[klass] = klass(expr)
 
@@ -1,9 +1,29 @@
-from collections import OrderedDict
+from collections import deque
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from time import perf_counter
 
-from .base import OgcAbstract
+from .base import OgcAbstract, PropertyName
+
+
+# Adaptive evaluation (see BinaryLogicOp._adaptive()): the conditions are measured on one feature
+# out of ADAPTIVE_SAMPLING, and reordered every ADAPTIVE_PERIOD features.
+ADAPTIVE_SAMPLING = 32
+ADAPTIVE_PERIOD = 1024
+
+# Larger integers cannot be converted to float
+_FLOAT_INT_LIMIT = 2 ** 1023
+
+
+def _plain_value(value):
+    # None, numbers and strings, which the conditions returned by _safe_properties() never raise for
+    if value is None or type(value) in (float, str):
+        return True
+    return type(value) == int and -_FLOAT_INT_LIMIT < value < _FLOAT_INT_LIMIT
 
 
 class LogicOpAbstract(OgcAbstract):
+    __slots__ = ()
+
     def __and__(self, other):
         return And(self, other)
 
@@ -19,74 +39,359 @@ class LogicOpAbstract(OgcAbstract):
     def __invert__(self):
         return Not(self)
 
+    def _safe_properties(self):
+        # Names of the properties whose values ensure that the compiled function does not raise when
+        # they are all in the feature and plain (see _plain_value()), or None if nothing ensures it.
+        # Adaptive evaluation only skips the conditions which can be told not to raise.
+        return None
+
+    def simulate_batch(self, columns, config=None):
+        return super().simulate_batch(columns, config).astype(bool)
+
+    @classmethod
+    def _simulate_batch_all(klass, conditions, columns, config=None):
+        # Like all(), a condition is only evaluated for the rows which all the previous conditions
+        # have accepted, so that it neither does needless work nor raises for rejected rows.
+        import numpy as np
+
+        length = klass._batch_length(columns)
+        mask = np.ones(length, dtype=bool)
+        for cond in conditions:
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                break
+            subset = columns if len(rows) == length else klass._batch_take(columns, rows)
+            mask[rows] = np.asarray(cond.simulate_batch(subset, config)) == True
+        return mask
+
+    @classmethod
+    def _simulate_batch_any(klass, conditions, columns, config=None):
+        import numpy as np
+
+        length = klass._batch_length(columns)
+        mask = np.zeros(length, dtype=bool)
+        for cond in conditions:
+            rows = np.flatnonzero(~mask)
+            if len(rows) == 0:
+                break
+            subset = columns if len(rows) == length else klass._batch_take(columns, rows)
+            mask[rows] = np.asarray(cond.simulate_batch(subset, config)) == True
+        return mask
+
+
+class LogicDict(MutableMapping):
+    # Conditions of a logic operator, keyed by their position like a list. They are stored in a
+    # deque, so that appending (at key len(self)) and prepending (see prepend()) take constant time.
+    # Deleting a condition shifts the keys of the following ones, like list.pop(i).
+    __slots__ = ('_items',)
 
-class LogicDict(OrderedDict):
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        self._items = deque()
+        self.update(*args, **kwargs)
 
-    def __setitem__(self, key, item):
+    @staticmethod
+    def _check(item):
         if not isinstance(item, LogicOpAbstract):
             raise TypeError(f'{repr(item)} is neither of logic (And, Or, Not) nor comparison (eg. PropertyIsEqualTo, Intersects)')
-        super().__setitem__(key, item)
+        return item
 
-    def __delitem__(self, key):
-        if key not in self:
-            super().__delitem__(key)  # raise exception from super class
+    def _index(self, key):
+        if type(key) != int or not 0 <= key < len(self._items):
+            raise KeyError(key)
+        return key
+
+    def __getitem__(self, key):
+        return self._items[self._index(key)]
+
+    def __setitem__(self, key, item):
+        self._check(item)
+        if key == len(self._items) and type(key) == int:
+            self._items.append(item)
         else:
-            newkey = 0
-            for oldkey in self.keys():
-                if oldkey == key:
-                    continue
-                if oldkey != newkey:
-                    self[newkey] = self[oldkey]
-                newkey += 1
-            super().__delitem__(oldkey)
+            self._items[self._index(key)] = item
+
+    def __delitem__(self, key):
+        del self._items[self._index(key)]
+
+    def __contains__(self, key):
+        return type(key) == int and 0 <= key < len(self._items)
+
+    def __iter__(self):
+        return iter(range(len(self._items)))
+
+    def __reversed__(self):
+        return reversed(range(len(self._items)))
+
+    def __len__(self):
+        return len(self._items)
+
+    def values(self):
+        return _LogicDictValues(self)
+
+    def items(self):
+        return _LogicDictItems(self)
+
+    def append(self, item):
+        self._items.append(self._check(item))
+
+    def prepend(self, item):
+        self._items.appendleft(self._check(item))
+
+    def extend(self, items):
+        self._items.extend(self._check(item) for item in items)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self.items())})'
+
+
+class _LogicDictValues(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self):
+        return iter(self._mapping._items)
+
+    def __reversed__(self):
+        return reversed(self._mapping._items)
+
+
+class _LogicDictItems(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self):
+        return enumerate(self._mapping._items)
+
+    def __reversed__(self):
+        return zip(reversed(self._mapping), reversed(self._mapping._items))
 
 
 class LogicOp(LogicOpAbstract):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
         self.children = LogicDict()
-        self.conditions = self.children  # alias
+
+    @property
+    def conditions(self):
+        return self.children
+
+    @conditions.setter
+    def conditions(self, value):
+        self.children = value if isinstance(value, LogicDict) else LogicDict(value)
+
+    def _compile_conditions(self, funcs, adaptive=False):
+        # Builds the compiled function of the operator from the compiled functions of its conditions,
+        # which RuleEvaluator also uses to share the ones of repeated subtrees
+        return self._combine(funcs)
+
+    def _safe_properties(self):
+        names = set()
+        for cond in self.conditions.values():
+            cond_names = cond._safe_properties()
+            if cond_names is None:
+                return None
+            names |= cond_names
+        return frozenset(names)
 
 
 class UnaryLogicOp(LogicOp):
+    __slots__ = ()
+
     def __init__(self, condition):
         super().__init__()
         self.conditions[0] = condition
         
 
 class BinaryLogicOp(LogicOp):
+    __slots__ = ()
+
     def __init__(self, condition0, condition1, *extra_logics):
         super().__init__()
-        self.conditions[0] = condition0
-        self.conditions[1] = condition1
-
-        for i, logic in enumerate(extra_logics, 2):
-            self.conditions[i] = logic
+        self.conditions.extend((condition0, condition1) + extra_logics)
 
     def append_condition(self, condition):
-        self.conditions[len(self.conditions)] = condition
+        self.conditions.append(condition)
 
     def prepend_condition(self, condition):
-        new_lst = [(0, condition)]
-        for i, cond in enumerate(self.conditions.values(), 1):
-            new_lst += [(i, cond)]
-        self.conditions = OrderedDict(new_lst)
-        self.children = self.conditions
+        self.conditions.prepend(condition)
+
+    def compile(self, adaptive=False):
+        # With adaptive=True, the compiled function keeps track of the cost of every condition and
+        # of how often it decides the result, and evaluates the cheap and decisive ones first.
+        return self._compile_conditions([
+            cond.compile(adaptive) if isinstance(cond, LogicOp) else cond.compile()
+            for cond in self.conditions.values()
+        ], adaptive)
+
+    def _compile_conditions(self, funcs, adaptive=False):
+        if not adaptive:
+            return self._combine(funcs)
+        safe = [cond._safe_properties() for cond in self.conditions.values()]
+        return self._combine(funcs, adaptive, self.property_names(), safe)
+
+    def property_names(self):
+        # Names of the properties read by the conditions
+        names = set()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, PropertyName):
+                names.add(node.text)
+            elif getattr(node, '_children', None):
+                stack.extend(node._children.values())
+        return frozenset(names)
+
+    @staticmethod
+    def _adaptive(funcs, strict, decisive, names, safe):
+        # The first condition which returns True (Or) or anything else (And) decides the result:
+        # the result of strict(), evaluating the conditions in order, is `decisive` (Or: True,
+        # And: False). The conditions are evaluated by increasing cost per decision, which gives
+        # the same results as long as the conditions which are skipped would not have raised:
+        # - features which miss one of the properties (`names`) are evaluated by strict(),
+        # - a condition is only skipped if it does not raise for plain values of the properties
+        #   listed in `safe` (see LogicOpAbstract._safe_properties()). When it decides, a condition
+        #   moved ahead checks the values read by the ones it skipped, and leaves the others to strict(),
+        # - the other conditions, and the ones which have raised once, keep their positions: the
+        #   following ones are not evaluated before them,
+        # - a condition raising before the decisive one was found makes strict() decide.
+        funcs = tuple(funcs)
+        positions = {id(func): i for i, func in enumerate(funcs)}
+        order = tuple((func, ()) for func in funcs)
+        costs = [0.0] * len(funcs)
+        decisions = [0] * len(funcs)
+        pinned = {i for i, cond_names in enumerate(safe) if cond_names is None}
+        count = 0
+
+        def reorder():
+            # Conditions are only sorted between the pinned ones
+            nonlocal order
+            new_order, segment = [], []
+            for i in range(len(funcs)):
+                if i in pinned:
+                    new_order += sorted(segment, key=rank) + [i]
+                    segment = []
+                else:
+                    segment.append(i)
+            new_order += sorted(segment, key=rank)
+
+            # Each condition is paired with the properties to check when it decides
+            order, done = [], set()
+            for i in new_order:
+                skipped = set()
+                for j in range(i):
+                    if j not in done:
+                        skipped |= safe[j]
+                order.append((funcs[i], tuple(sorted(skipped))))
+                done.add(i)
+            order = tuple(order)
+
+        def pin(i):
+            if i not in pinned:
+                pinned.add(i)
+                reorder()
+
+        def measure(data, config):
+            # Evaluates all the conditions, so that the statistics do not depend on the order
+            result = not decisive
+            error = None
+            for i, func in enumerate(funcs):
+                start = perf_counter()
+                try:
+                    decides = (func(data, config) is True) == decisive
+                except Exception as e:
+                    decides = False
+                    pin(i)
+                    if error is None and result is not decisive:
+                        error = e
+                costs[i] += perf_counter() - start
+                if decides:
+                    decisions[i] += 1
+                    if error is None:
+                        result = decisive
+            if result is not decisive and error is not None:
+                raise error
+            return result
+
+        def rank(i):
+            return (0, costs[i] / decisions[i]) if decisions[i] else (1, costs[i])
+
+        def simulate(data, config=None):
+            nonlocal count
+            if not isinstance(data, dict) or not names <= data.keys():
+                return strict(data, config)
+
+            count += 1
+            if count % ADAPTIVE_SAMPLING == 0:
+                try:
+                    return measure(data, config)
+                finally:
+                    if count % ADAPTIVE_PERIOD == 0:
+                        reorder()
+            try:
+                for func, skipped in order:
+                    if (func(data, config) is True) == decisive:
+                        break
+                else:
+                    return not decisive
+            except Exception:
+                pin(positions[id(func)])
+                return strict(data, config)
+
+            # The skipped conditions might have raised for other values
+            for name in skipped:
+                if name not in data or not _plain_value(data[name]):
+                    return strict(data, config)
+            return decisive
+        return simulate
 
 
 class Not(UnaryLogicOp):
+    __slots__ = ()
+
     def simulate(self, data):
         return not self.conditions[0].simulate(data)
 
+    def simulate_batch(self, columns, config=None):
+        import numpy as np
+
+        return ~np.asarray(self.conditions[0].simulate_batch(columns, config), dtype=bool)
+
+    def compile(self, adaptive=False):
+        cond = self.conditions[0]
+        return self._combine([cond.compile(adaptive) if isinstance(cond, LogicOp) else cond.compile()])
+
+    @staticmethod
+    def _combine(funcs, adaptive=False):
+        # Builds the compiled function of this operator from the compiled functions of its conditions
+        func, = funcs
+
+        def simulate(data, config=None):
+            return not func(data, config)
+        return simulate
+
     def __invert__(self):
         return self.conditions[0]
 
 
 class And(BinaryLogicOp):
+    __slots__ = ()
+
     def simulate(self, data):
         return all(cond.simulate(data) is True for cond in self.conditions.values())
+
+    def simulate_batch(self, columns, config=None):
+        return self._simulate_batch_all(self.conditions.values(), columns, config)
+
+    @classmethod
+    def _combine(klass, funcs, adaptive=False, names=frozenset(), safe=()):
+        funcs = tuple(funcs)
+
+        def simulate(data, config=None):
+            for func in funcs:
+                if func(data, config) is not True:
+                    return False
+            return True
+        return klass._adaptive(funcs, simulate, False, names, safe) if adaptive else simulate
         
     def __and__(self, other):
         if type(other) == And:
@@ -102,9 +407,48 @@ class And(BinaryLogicOp):
         
 
 class Or(BinaryLogicOp):
+    __slots__ = ()
+
     def simulate(self, data):
         return any(cond.simulate(data) is True for cond in self.conditions.values())
 
+    def simulate_batch(self, columns, config=None):
+        return self._simulate_batch_any(self.conditions.values(), columns, config)
+
+    def _compile_conditions(self, funcs, adaptive=False):
+        # Equalities between one property and Literals (eg. categorized styles) are evaluated as a
+        # single lookup in an EqualityIndex. Values which cannot be looked up are compared one by one.
+        from .comparison_ops import EqualityIndex
+
+        fallback = super()._compile_conditions(funcs, adaptive)
+        keys = [EqualityIndex.equality_key(cond) for cond in self.conditions.values()]
+        if None in keys or len({name for name, text in keys}) != 1:
+            return fallback
+
+        index = EqualityIndex()
+        for name, text in keys:
+            index.add(text, True)
+        lookup = index.lookup
+        func = self.conditions[0].expr0.compile()
+
+        def simulate(data, config=None):
+            value = func(data, config)
+            if value is None or type(value) in (int, float, str):
+                return bool(lookup(value))
+            return fallback(data, config)
+        return simulate
+
+    @classmethod
+    def _combine(klass, funcs, adaptive=False, names=frozenset(), safe=()):
+        funcs = tuple(funcs)
+
+        def simulate(data, config=None):
+            for func in funcs:
+                if func(data, config) is True:
+                    return True
+            return False
+        return klass._adaptive(funcs, simulate, True, names, safe) if adaptive else simulate
+
     def __or__(self, other):
         if type(other) == Or:
             for cond in other.conditions.values():
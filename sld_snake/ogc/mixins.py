@@ -3,6 +3,8 @@ from .base import Expression, PropertyName
 
 
 class OneExpressionMixin:
+    __slots__ = ()
+
     @property
     def expr0(self):
         return self.children[0]
@@ -13,6 +15,8 @@ class OneExpressionMixin:
 
 
 class OneExpressionOverloading:
+    __slots__ = ()
+
     def __iadd__(self, other):
         self.expr0 += other
         return self.expr0
@@ -31,6 +35,8 @@ class OneExpressionOverloading:
 
 
 class TwoExpressionMixin(OneExpressionMixin):
+    __slots__ = ()
+
     @property
     def expr1(self):
         return self.children[1]
@@ -41,6 +47,8 @@ class TwoExpressionMixin(OneExpressionMixin):
         
         
 class PropertyNameMixin:
+    __slots__ = ()
+
     @property
     def propertyName(self):
         return self.children.get('propertyName', None)
@@ -57,17 +65,20 @@ class PropertyNameMixin:
 
 
 class MatchCaseMixin:
+    __slots__ = ()
+
     @property
     def matchCase(self):
-        text = self.attrib.get('matchCase', 'true')
-        return text != 'false'
+        if not self._attrib:
+            return True
+        return self._attrib.get('matchCase', 'true') != 'false'
 
     @matchCase.setter
     def matchCase(self, value):
         wrapped = None
         if value is None:
-            if 'matchCase' in self.attrib:
-                del self.attrib['matchCase']
+            if self._attrib and 'matchCase' in self._attrib:
+                del self._attrib['matchCase']
             return
 
         if type(value) == bool:
@@ -1,3 +1,5 @@
+from abc import ABCMeta, abstractmethod
+
 from ..gml import Geometry
 
 from .base import PropertyName
@@ -6,6 +8,8 @@ from .mixins import PropertyNameMixin
 
 
 class SpatialOp(LogicOpAbstract, PropertyNameMixin):
+    __slots__ = ()
+
     @staticmethod
     def _simulate_wrapper(elem, *args, **kwargs):
         if type(elem) == Geometry:
@@ -15,9 +19,14 @@ class SpatialOp(LogicOpAbstract, PropertyNameMixin):
         return geom.simulate(*args, **kwargs)
 
 
-class BinarySpatialOp(SpatialOp, PropertyNameMixin):
+class BinarySpatialOp(SpatialOp, PropertyNameMixin, metaclass=ABCMeta):
+    __slots__ = ('_filter_ogr', '_reprojected', 'envelope_hits', 'envelope_misses')
+    _transient = ('_filter_ogr', '_reprojected')
+
     def __init__(self, propety_name, geometry):
         super().__init__()
+        self._reset_caches()
+        self.reset_envelope_stats()
         self.propertyName = propety_name
         self.geometry = geometry
 
@@ -27,66 +36,190 @@ class BinarySpatialOp(SpatialOp, PropertyNameMixin):
 
     @geometry.setter
     def geometry(self, value):
-        if type(value) == PropertyName:
+        self._reset_caches()
+        if isinstance(value, PropertyName):
             self.children['geometry'] = value
         else:
             self.children['geometry'] = Geometry.wrap(value)
 
-    def simulate(self, *args, **kwargs):
+    def _reset_caches(self):
+        self._filter_ogr = None
+        self._reprojected = {}
+
+    def _simulate_geometry(self, *args, **kwargs):
+        # A constant geometry is converted and prepared once, then reused for every feature
+        if type(self.geometry) != Geometry:
+            return self._simulate_wrapper(self.geometry, *args, **kwargs)
+
+        if self._filter_ogr is None:
+            self._filter_ogr = self.geometry.simulate(*args, **kwargs).prepare()
+        return self._filter_ogr
+
+    def _simulate_operands(self, *args, **kwargs):
         ogr0 = self._simulate_wrapper(self.propertyName, *args, **kwargs)
-        ogr1 = self._simulate_wrapper(self.geometry, *args, **kwargs)
-        srs0 = ogr0.spatial_ref
+        ogr1 = self._simulate_geometry(*args, **kwargs)
+        return ogr0, self._reproject(ogr1, ogr0.spatial_ref)
+
+    def _reproject(self, ogr1, srs0):
+        # The filter geometry is compared in the CRS of the feature when both are known
         srs1 = ogr1.spatial_ref
-        if not (srs0 is None or srs1 is None):
-            if not srs0.IsSame(srs1):
-                ogr1 = ogr1.transform_to(srs0)
+        if srs0 is None or srs1 is None:
+            return ogr1
 
-        return ogr0, ogr1
+        key = ogr1.srs_key(srs0)
+        if ogr1.is_same_srs(srs0, key):
+            return ogr1
 
+        if ogr1 is not self._filter_ogr:
+            return ogr1.transform_to(srs0)
+
+        # The constant filter geometry is transformed (and prepared) once per feature CRS
+        if key not in self._reprojected:
+            self._reprojected[key] = ogr1.transform_to(srs0).prepare()
+        return self._reprojected[key]
+
+    def reset_envelope_stats(self):
+        # envelope_hits counts the evaluations decided by comparing envelopes only,
+        # envelope_misses the ones which needed the full OGR predicate
+        self.envelope_hits = 0
+        self.envelope_misses = 0
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        # Returns the result of the predicate if it is evident from the envelopes of the feature
+        # geometry (ogr0) and the filter geometry (ogr1), otherwise None
+        return None
+
+    @staticmethod
+    @abstractmethod
+    def _predicate(ogr0, ogr1):
+        # The full OGR predicate between the feature geometry (ogr0) and the filter geometry (ogr1)
+        pass
 
-class Equals(BinarySpatialOp):
     def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
+        ogr0, ogr1 = self._simulate_operands(*args, **kwargs)
+        return self._simulate_ogr(ogr0, ogr1)
+
+    def _simulate_ogr(self, ogr0, ogr1):
+        result = self._envelope_test(ogr0, ogr1)
+        if result is None:
+            self.envelope_misses += 1
+            return self._predicate(ogr0, ogr1)
+        self.envelope_hits += 1
+        return result
+
+
+class Equals(BinarySpatialOp):
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        # Different envelopes rule equality out; equal envelopes decide nothing, so the
+        # geometries are still compared by the OGR predicate
+        if ogr0.envelope != ogr1.envelope:
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
         return ogr0.equals(ogr1)
 
 
 class Disjoint(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
-        return ogr0.disjoint(ogr1)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr0.envelope_intersects(ogr1):
+            return True
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
+        # Disjoint is the negation of Intersects, which can use the prepared filter geometry
+        return not ogr1.intersects(ogr0)
 
 
 class Touches(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr0.envelope_intersects(ogr1):
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
         return ogr0.touches(ogr1)
 
 
 class Within(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
-        return ogr0.within(ogr1)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr1.envelope_contains(ogr0):
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
+        # A within B is B contains A, which can use the prepared filter geometry
+        return ogr1.contains(ogr0)
 
 
 class Overlaps(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr0.envelope_intersects(ogr1):
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
         return ogr0.overlaps(ogr1)
 
 
 class Crosses(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr0.envelope_intersects(ogr1):
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
         return ogr0.crosses(ogr1)
 
 
 class Intersects(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
-        return ogr0.intersects(ogr1)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr0.envelope_intersects(ogr1):
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
+        return ogr1.intersects(ogr0)
 
 
 class Contains(BinarySpatialOp):
-    def simulate(self, *args, **kwargs):
-        ogr0, ogr1 = super().simulate(*args, **kwargs)
+    __slots__ = ()
+
+    @staticmethod
+    def _envelope_test(ogr0, ogr1):
+        if not ogr0.envelope_contains(ogr1):
+            return False
+        return None
+
+    @staticmethod
+    def _predicate(ogr0, ogr1):
         return ogr0.contains(ogr1)
@@ -0,0 +1,134 @@
+import math
+
+from ..gml import Geometry
+from ..ogc.spatial_ops import BinarySpatialOp, Disjoint
+
+
+class STRtree:
+    # Sort-Tile-Recursive packed R-tree over envelopes in OGR order (minX, maxX, minY, maxY).
+    # The tree is static: it is bulk loaded once and answers which envelopes intersect a query envelope.
+    def __init__(self, envelopes, node_capacity=10):
+        if node_capacity < 2:
+            raise ValueError('node_capacity must be 2 or greater')
+
+        self.node_capacity = node_capacity
+        self._size = 0
+        # Nodes are (envelope, children, is_leaf). Leaf entries are (envelope, item).
+        level = []
+        for item, envelope in enumerate(envelopes):
+            level.append((tuple(envelope), item))
+            self._size += 1
+
+        self._root = None
+        if level:
+            is_leaf = True
+            while True:
+                level = self._pack(level, is_leaf)
+                is_leaf = False
+                if len(level) == 1:
+                    break
+            self._root = level[0]
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _union(entries):
+        return (
+            min(entry[0][0] for entry in entries),
+            max(entry[0][1] for entry in entries),
+            min(entry[0][2] for entry in entries),
+            max(entry[0][3] for entry in entries),
+        )
+
+    def _pack(self, entries, is_leaf):
+        capacity = self.node_capacity
+        node_count = math.ceil(len(entries) / capacity)
+        slice_count = math.ceil(math.sqrt(node_count))
+        slice_size = slice_count * capacity
+
+        entries = sorted(entries, key=lambda entry: entry[0][0] + entry[0][1])
+        nodes = []
+        for i in range(0, len(entries), slice_size):
+            vertical_slice = sorted(entries[i:i + slice_size], key=lambda entry: entry[0][2] + entry[0][3])
+            for j in range(0, len(vertical_slice), capacity):
+                children = vertical_slice[j:j + capacity]
+                nodes.append((self._union(children), children, is_leaf))
+        return nodes
+
+    def query(self, envelope):
+        # Returns the items (positions of the envelopes given at construction) whose envelopes
+        # intersect the given envelope, in ascending order
+        min_x, max_x, min_y, max_y = envelope
+        items = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_envelope, children, is_leaf = stack.pop()
+            for child in children:
+                env = child[0]
+                if env[0] <= max_x and min_x <= env[1] and env[2] <= max_y and min_y <= env[3]:
+                    if is_leaf:
+                        items.append(child[1])
+                    else:
+                        stack.append(child)
+        items.sort()
+        return items
+
+
+class FeatureIndex:
+    # Evaluates binary spatial operators over a collection of features (dicts) at once. Candidate
+    # features are found by probing an STRtree built over the feature envelopes, then refined with
+    # the exact OGR predicate. Features outside the filter envelope are decided without OGR.
+    def __init__(self, features, property_name, node_capacity=10):
+        self.features = list(features)
+        self.property_name = property_name
+        self._geometries = [Geometry.wrap(feature[property_name]).simulate() for feature in self.features]
+
+        # The index is only usable if all the features share the same CRS (or none has any)
+        self.spatial_ref = None
+        self._single_crs = True
+        if self._geometries:
+            self.spatial_ref = self._geometries[0].spatial_ref
+        for geom in self._geometries:
+            srs = geom.spatial_ref
+            if (srs is None) != (self.spatial_ref is None) or (srs is not None and not geom.is_same_srs(self.spatial_ref)):
+                self._single_crs = False
+                break
+
+        self._tree = STRtree([geom.envelope for geom in self._geometries], node_capacity)
+
+    def __len__(self):
+        return len(self.features)
+
+    def query(self, envelope):
+        # Features whose envelopes intersect the given (minX, maxX, minY, maxY) envelope, like BBOX
+        return [self.features[i] for i in self._tree.query(envelope)]
+
+    def _indexable(self, op):
+        return (
+            isinstance(op, BinarySpatialOp) and
+            type(op.geometry) == Geometry and
+            op.propertyName.text == self.property_name and
+            self._single_crs
+        )
+
+    def evaluate(self, op, config=None):
+        # Returns a list of booleans, one per feature, equal to op.simulate(feature)
+        if not self._indexable(op):
+            func = op.compile()
+            return [func(feature, config) for feature in self.features]
+
+        ogr1 = op._reproject(op._simulate_geometry(), self.spatial_ref)
+        if ogr1._ogr.IsEmpty():
+            # Empty geometries have no meaningful envelope to probe the tree with
+            return [op._simulate_ogr(ogr0, ogr1) for ogr0 in self._geometries]
+
+        # Features whose envelopes do not touch the filter envelope are disjoint from it
+        results = [isinstance(op, Disjoint)] * len(self.features)
+        for i in self._tree.query(ogr1.envelope):
+            results[i] = op._simulate_ogr(self._geometries[i], ogr1)
+        return results
+
+    def select(self, op, config=None):
+        # Features for which op is true
+        return [feature for feature, result in zip(self.features, self.evaluate(op, config)) if result]
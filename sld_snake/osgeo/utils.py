@@ -1,17 +1,104 @@
+from collections import OrderedDict
 import json
 from osgeo import ogr, osr
 import re
+import threading
 
 from ..base import ET
 
 
+class SRSRegistry:
+    # LRU-bounded caches of osr.SpatialReference objects by EPSG code, and of
+    # osr.CoordinateTransformation objects and IsSame() results by (source, target) pair.
+    # Looking up the EPSG database and building transformations are expensive in GDAL,
+    # whilst the same few CRSs are used over and over when simulating filters.
+    # The registry is shared between threads, so the caches are only touched under a lock.
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._srs = OrderedDict()
+        self._transformations = OrderedDict()
+        self._same = OrderedDict()
+
+    def _get(self, cache, key, factory):
+        with self._lock:
+            try:
+                value = cache[key]
+            except KeyError:
+                pass
+            else:
+                cache.move_to_end(key)
+                return value
+
+        # GDAL does the expensive part without holding the lock, a concurrent miss just builds it twice
+        value = factory()
+        with self._lock:
+            cache[key] = value
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        return value
+
+    @staticmethod
+    def key(srs):
+        # Identifies a CRS by its authority code when it has one, else by its WKT. The axis mapping
+        # is part of the key since the same EPSG code may be used with either axis order.
+        axis_mapping = ()
+        if hasattr(srs, 'GetDataAxisToSRSAxisMapping'):
+            axis_mapping = tuple(srs.GetDataAxisToSRSAxisMapping())
+
+        authority = srs.GetAuthorityName(None)
+        code = srs.GetAuthorityCode(None)
+        if authority and code:
+            return (authority, code, axis_mapping)
+        return (srs.ExportToWkt(), axis_mapping)
+
+    def srs(self, srid):
+        def create():
+            srs = osr.SpatialReference()
+            if srs.ImportFromEPSG(srid) != 0:
+                raise ValueError(f'GDAL could not resolve EPSG {srid}. Is this a valid EPSG code?')
+            return srs
+        return self._get(self._srs, srid, create)
+
+    def _pair_key(self, srs0, srs1, key0=None, key1=None):
+        # Callers which already know the key of a CRS pass it to spare the GDAL calls
+        if key0 is None:
+            key0 = self.key(srs0)
+        if key1 is None:
+            key1 = self.key(srs1)
+        return (key0, key1)
+
+    def transformation(self, srs_from, srs_to, key_from=None, key_to=None):
+        key = self._pair_key(srs_from, srs_to, key_from, key_to)
+        return self._get(self._transformations, key, lambda: osr.CoordinateTransformation(srs_from, srs_to))
+
+    def is_same(self, srs0, srs1, key0=None, key1=None):
+        key = self._pair_key(srs0, srs1, key0, key1)
+        return self._get(self._same, key, lambda: bool(srs0.IsSame(srs1)))
+
+    def clear(self):
+        with self._lock:
+            self._srs.clear()
+            self._transformations.clear()
+            self._same.clear()
+
+
+# Shared by all the geometries and operators
+SRS_REGISTRY = SRSRegistry()
+
+
 class OgrWrapper:
     def __init__(self, source, srid=None):
         self.source = source
         self._ogr = None
+        self._prepared = None
+        self._envelope = None
+        self._srs_key = None
 
         if type(source) == ogr.Geometry:
-            self._ogr = source
+            # The caller may still transform the geometry or assign it a CRS, which must not outdate
+            # the envelope, prepared geometry and CRS key cached here
+            self._ogr = source.Clone()
         else:
             self._ogr = self._to_ogr(source, srid)
 
@@ -71,15 +158,48 @@ class OgrWrapper:
 
         return geom
 
+    def __getstate__(self):
+        # Pickled as ISO WKB plus the CRS, as an EPSG code when it has one and as WKT otherwise.
+        # The envelope and the prepared geometry are rebuilt on demand.
+        state = { 'wkb': bytes(self._ogr.ExportToIsoWkb()), 'srs': None, 'prepared': self.prepared }
+        srs = self.spatial_ref
+        if srs is not None:
+            if srs.GetAuthorityName(None) == 'EPSG' and srs.GetAuthorityCode(None):
+                state['srs'] = int(srs.GetAuthorityCode(None))
+            else:
+                state['srs'] = srs.ExportToWkt()
+            if hasattr(srs, 'GetDataAxisToSRSAxisMapping'):
+                state['axis_mapping'] = list(srs.GetDataAxisToSRSAxisMapping())
+        return state
+
+    def __setstate__(self, state):
+        geom = ogr.CreateGeometryFromWkb(state['wkb'])
+        srs = state['srs']
+        if srs is not None:
+            if isinstance(srs, int):
+                srs = self._create_srs(srs)
+            else:
+                srs = osr.SpatialReference(srs)
+            axis_mapping = state.get('axis_mapping')
+            if axis_mapping is not None and list(srs.GetDataAxisToSRSAxisMapping()) != axis_mapping:
+                srs = srs.Clone()  # The registry's instance is shared
+                srs.SetDataAxisToSRSAxisMapping(axis_mapping)
+            geom.AssignSpatialReference(srs)
+
+        self.source = geom
+        self._ogr = geom
+        self._prepared = None
+        self._envelope = None
+        self._srs_key = None
+        if state['prepared']:
+            self.prepare()
+
     @staticmethod
     def _create_srs(srid):
         if type(srid) != int:
             raise TypeError('srid is not integer')
 
-        srs = osr.SpatialReference()
-        if srs.ImportFromEPSG(srid) != 0:
-            raise ValueError(f'GDAL could not resolve EPSG {srid}. Is this a valid EPSG code?')
-        return srs
+        return SRS_REGISTRY.srs(srid)
 
     @staticmethod
     def _set_srs(geom, srid):
@@ -93,18 +213,64 @@ class OgrWrapper:
             raise ValueError('srs is not osr.SpatialReference instance')
 
         srs_from = self.spatial_ref
+        key_from = self.spatial_ref_key
         if srs_from is None:
             srs_from = self._create_srs(srid=4326)
 
-        copy = OgrWrapper(self.source, None)
-        transform = osr.CoordinateTransformation(srs_from, srs)
+        copy = OgrWrapper(self._ogr)  # Cloned by __init__()
+        transform = SRS_REGISTRY.transformation(srs_from, srs, key_from)
         copy._ogr.Transform(transform)
         return copy
 
+    def is_same_srs(self, srs, key=None):
+        # key is srs_key(srs) when the caller already has it
+        return SRS_REGISTRY.is_same(self.spatial_ref, srs, self.spatial_ref_key, key)
+
+    @staticmethod
+    def srs_key(srs):
+        return SRS_REGISTRY.key(srs)
+
+    def prepare(self):
+        # Builds a prepared (indexed) geometry which speeds up repeated Intersects/Contains tests
+        # against this geometry. GDAL bindings without prepared geometry support are left as they are.
+        if self._prepared is None and hasattr(self._ogr, 'CreatePreparedGeometry'):
+            self._prepared = self._ogr.CreatePreparedGeometry()
+        return self
+
+    @property
+    def prepared(self):
+        return self._prepared is not None
+
+    @property
+    def envelope(self):
+        # (minX, maxX, minY, maxY) as returned by OGR
+        if self._envelope is None:
+            self._envelope = self._ogr.GetEnvelope()
+        return self._envelope
+
+    def envelope_intersects(self, other):
+        min_x0, max_x0, min_y0, max_y0 = self.envelope
+        min_x1, max_x1, min_y1, max_y1 = self.wrap(other).envelope
+        return min_x0 <= max_x1 and min_x1 <= max_x0 and min_y0 <= max_y1 and min_y1 <= max_y0
+
+    def envelope_contains(self, other):
+        min_x0, max_x0, min_y0, max_y0 = self.envelope
+        min_x1, max_x1, min_y1, max_y1 = self.wrap(other).envelope
+        return min_x0 <= min_x1 and max_x1 <= max_x0 and min_y0 <= min_y1 and max_y1 <= max_y0
+
     @property
     def spatial_ref(self):
         return self._ogr.GetSpatialReference()
 
+    @property
+    def spatial_ref_key(self):
+        # SRSRegistry.key() of spatial_ref, computed once since it takes several GDAL calls
+        if self._srs_key is None:
+            srs = self.spatial_ref
+            if srs is not None:
+                self._srs_key = SRS_REGISTRY.key(srs)
+        return self._srs_key
+
     @property
     def gml2(self):
         return self._ogr.ExportToGML()
@@ -121,6 +287,8 @@ class OgrWrapper:
 
     def intersects(self, other):
         other = self.wrap(other)
+        if self._prepared is not None:
+            return self._prepared.Intersects(other._ogr)
         return self._ogr.Intersects(other._ogr)
 
     def disjoint(self, other):
@@ -141,6 +309,8 @@ class OgrWrapper:
 
     def contains(self, other):
         other = self.wrap(other)
+        if self._prepared is not None:
+            return self._prepared.Contains(other._ogr)
         return self._ogr.Contains(other._ogr)
 
     def within(self, other):
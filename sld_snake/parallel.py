@@ -0,0 +1,73 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+import pickle
+
+
+# Set in every worker process by _initialize()
+_filter = None
+_config = None
+
+
+def _initialize(payload, config):
+    global _filter, _config
+    _filter = pickle.loads(payload).compile()
+    _config = config
+
+
+def _evaluate(chunk):
+    return [_filter(feature, _config) for feature in chunk]
+
+
+class ParallelEvaluator:
+    # Evaluates a filter against many features in a pool of worker processes. The filter is
+    # pickled once, unpickled and compiled once per worker, and features are sent in chunks.
+    def __init__(self, op, config=None, max_workers=None, chunksize=1000, mp_context=None):
+        if chunksize < 1:
+            raise ValueError(f'chunksize must be positive: {repr(chunksize)}')
+
+        self.op = op
+        self.config = config
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context,
+            initializer=_initialize,
+            initargs=(pickle.dumps(op), config),
+        )
+
+    def _iter_chunks(self, features):
+        # At most two chunks per worker are in flight, so that features are consumed lazily
+        features = iter(features)
+        pending = deque()
+        for chunk in iter(lambda: list(islice(features, self.chunksize)), []):
+            pending.append((chunk, self._executor.submit(_evaluate, chunk)))
+            if len(pending) >= 2 * self.max_workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+    def evaluate(self, features):
+        # Yields op.simulate(feature, config) for every feature, in order
+        for chunk, results in self._iter_chunks(features):
+            yield from results
+
+    def select(self, features):
+        for chunk, results in self._iter_chunks(features):
+            for feature, result in zip(chunk, results):
+                if result is True:
+                    yield feature
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
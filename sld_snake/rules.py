@@ -0,0 +1,199 @@
+from collections import Counter
+
+from .ogc import PropertyName
+from .ogc.comparison_ops import EqualityIndex
+from .ogc.logic_ops import LogicOp, And, Or
+
+
+_UNSET = object()
+
+
+def _always(data, config=None):
+    return True
+
+
+class RuleEvaluator:
+    # Evaluates the filters of many rules (e.g. all the rules of a style) against one feature at a
+    # time. Structurally identical subtrees (see OgcAbstract.structure_key()) are compiled once, and
+    # the ones which occur more than once are evaluated at most once per feature.
+    # A rule without a filter (None) matches every feature, like in SLD.
+    def __init__(self, filters, config=None):
+        self.filters = list(filters)
+        self.config = config
+
+        keys = {}  # id(node) -> structure key
+        counts = Counter()
+        for op in self.filters:
+            if op is not None:
+                self._structure_key(op, keys)
+                self._count(op, keys, counts)
+
+        self._memo = []
+        compiled = {}
+        self._funcs = [
+            _always if op is None else self._compile(op, keys, counts, compiled)
+            for op in self.filters
+        ]
+        self._unset = [_UNSET] * len(self._memo)
+
+    @property
+    def shared_count(self):
+        # Number of distinct subtrees which are shared by more than one rule or position
+        return len(self._memo)
+
+    @classmethod
+    def _structure_key(klass, node, keys):
+        # Same as node.structure_key(), computed once for every node of the tree
+        if isinstance(node, LogicOp):
+            attrib = tuple(sorted(node._attrib.items())) if node._attrib else ()
+            children = tuple((key, klass._structure_key(child, keys)) for key, child in node.conditions.items())
+            keys[id(node)] = (type(node), node.text, attrib, children)
+        else:
+            keys[id(node)] = node.structure_key()
+        return keys[id(node)]
+
+    @staticmethod
+    def _count(node, keys, counts):
+        # The conditions of a repeated subtree are only counted once: they are evaluated through it
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            key = keys[id(node)]
+            counts[key] += 1
+            if counts[key] == 1 and isinstance(node, LogicOp):
+                stack.extend(node.conditions.values())
+
+    def _compile(self, node, keys, counts, compiled):
+        key = keys[id(node)]
+        if key in compiled:
+            return compiled[key]
+
+        if isinstance(node, LogicOp):
+            func = node._compile_conditions([self._compile(cond, keys, counts, compiled) for cond in node.conditions.values()])
+        else:
+            func = node.compile()
+
+        if counts[key] > 1:
+            func = self._memoize(func)
+        compiled[key] = func
+        return func
+
+    def _memoize(self, func):
+        memo = self._memo
+        index = len(memo)
+        memo.append(_UNSET)
+
+        def simulate(data, config=None):
+            value = memo[index]
+            if value is _UNSET:
+                value = memo[index] = func(data, config)
+            return value
+        return simulate
+
+    def evaluate(self, data):
+        # Returns the result of every filter for the feature, in the order of the filters
+        self._memo[:] = self._unset
+        config = self.config
+        return [func(data, config) for func in self._funcs]
+
+    def matching(self, data):
+        # Returns the indices of the filters which the feature passes
+        self._memo[:] = self._unset
+        config = self.config
+        return [i for i, func in enumerate(self._funcs) if func(data, config) is True]
+
+
+class RuleDispatchIndex(RuleEvaluator):
+    # RuleEvaluator for categorized styles, where rules test PropertyIsEqualTo on one attribute.
+    # Rules are indexed by the Literals the attribute must be equal to for them to pass (see
+    # _keys()), so that only the rules which can match a feature, and the ones which cannot be
+    # indexed, are evaluated. The attribute defaults to the one most rules are indexed by.
+    # Features whose value is not indexable (see EqualityIndex.indexable()) evaluate every rule.
+    def __init__(self, filters, config=None, attribute=None):
+        super().__init__(filters, config)
+
+        if attribute is None:
+            names = Counter(self._attribute(op) for op in self.filters)
+            del names[None]
+            attribute = names.most_common(1)[0][0] if names else None
+        self.attribute = attribute
+
+        self._index = EqualityIndex()
+        self._always = []  # Rules which are not indexed
+        for i, op in enumerate(self.filters):
+            keys = None if op is None or attribute is None else self._keys(op, attribute)
+            if keys is None:
+                self._always.append(i)
+            for text in keys or ():
+                self._index.add(text, i)
+        self._get_value = PropertyName(attribute).compile() if attribute is not None else None
+
+    @classmethod
+    def _attribute(klass, op):
+        # Name of the attribute op could be indexed by
+        key = EqualityIndex.equality_key(op)
+        if key is not None:
+            return key[0]
+        if type(op) in (And, Or):
+            return klass._attribute(op.conditions[0])
+        return None
+
+    @classmethod
+    def _keys(klass, op, attribute):
+        # Returns the texts of the Literals one of which the attribute must be equal to for op to
+        # pass, or None. Only the first condition of an And is used, since op must not raise
+        # instead of rejecting features when it is not evaluated.
+        key = EqualityIndex.equality_key(op)
+        if key is not None:
+            return [key[1]] if key[0] == attribute else None
+        if type(op) == And:
+            return klass._keys(op.conditions[0], attribute)
+        if type(op) == Or:
+            keys = []
+            for cond in op.conditions.values():
+                texts = klass._keys(cond, attribute)
+                if texts is None:
+                    return None
+                keys += texts
+            return keys
+        return None
+
+    @property
+    def indexed_count(self):
+        return len(self.filters) - len(self._always)
+
+    def candidates(self, data):
+        # Returns the indices of the filters which can pass for the feature, or None if all can
+        if self._get_value is None:
+            return None
+        try:
+            value = self._get_value(data, self.config)
+        except Exception:
+            return None  # Evaluating the rules raises the same exception as without the index
+        if not EqualityIndex.indexable(value):
+            return None
+        ids = self._index.lookup(value)
+        return sorted(set(ids).union(self._always)) if ids else list(self._always)
+
+    def evaluate(self, data):
+        candidates = self.candidates(data)
+        if candidates is None:
+            return super().evaluate(data)
+
+        self._memo[:] = self._unset
+        config = self.config
+        funcs = self._funcs
+        results = [False] * len(funcs)
+        for i in candidates:
+            results[i] = funcs[i](data, config)
+        return results
+
+    def matching(self, data):
+        candidates = self.candidates(data)
+        if candidates is None:
+            return super().matching(data)
+
+        self._memo[:] = self._unset
+        config = self.config
+        funcs = self._funcs
+        return [i for i in candidates if funcs[i](data, config) is True]
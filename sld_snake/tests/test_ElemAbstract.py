@@ -1,3 +1,8 @@
+import io
+import pytest
+import re
+import xml.etree.ElementTree as ET
+
 from ..base import ElemAbstract
 
 
@@ -31,4 +36,89 @@ def test_ElemAbstract_xml():
     elem.children['ash'] = Ash()
     assert elem.xml(True) == '<ogc:Foo><sld:Bar /><sld:Ash /></ogc:Foo>'
     
-    
\ No newline at end of file
+    
+    # Only the namespace declarations are removed, not text that looks like them
+    elem.children['bar'].text = ' xmlns:foo="bar" '
+    assert elem.xml() == (
+        '<ogc:Foo xmlns:ogc="http://www.opengis.net/ogc" xmlns:sld="http://www.opengis.net/sld">'
+        '<sld:Bar> xmlns:foo="bar" </sld:Bar><sld:Ash /></ogc:Foo>'
+    )
+    assert elem.xml(True) == '<ogc:Foo><sld:Bar> xmlns:foo="bar" </sld:Bar><sld:Ash /></ogc:Foo>'
+
+
+def test_ElemAbstract_iterxml():
+    class Foo(ElemAbstract):
+        nameSpace = 'ogc'
+        tagName = 'Foo'
+
+    class Bar(ElemAbstract):
+        nameSpace = 'sld'
+        tagName = 'Bar'
+
+    elem = Foo()
+    elem.attrib['name'] = 'a "quoted" <name>\n'
+    for i in range(100):
+        child = Bar()
+        child.text = f'Röslein & {i} <roth>'
+        elem.children[i] = child
+    elem.children[100] = Bar()
+
+    for no_xmlns in [False, True]:
+        assert ''.join(elem.iterxml(no_xmlns)) == elem.xml(no_xmlns)
+
+        chunks = list(elem.iterxml(no_xmlns, chunk_size=100))
+        assert len(chunks) > 1
+        assert ''.join(chunks) == elem.xml(no_xmlns)
+
+    fileobj = io.BytesIO()
+    elem.write_xml(fileobj)
+    assert fileobj.getvalue() == elem.xml().encode('utf-8')
+
+    fileobj = io.StringIO()
+    elem.write_xml(fileobj, no_xmlns=True)
+    assert fileobj.getvalue() == elem.xml(no_xmlns=True)
+
+    # Elements which build their own etree() are only serialised when they are reached
+    class Baz(ElemAbstract):
+        built = 0
+
+        def etree(self, config=None):
+            Baz.built += 1
+            root = ET.Element('{http://www.opengis.net/gml}Point', { '{http://www.w3.org/1999/xlink}href': '#a' })
+            ET.SubElement(root, '{http://www.opengis.net/gml}pos').text = '1 2'
+            return root
+
+        def _xml_prefixes(self, config=None):
+            return { 'gml': self.NAMESPACES['gml'] }
+
+    elem.children[101] = Baz()
+    chunks = elem.iterxml(chunk_size=100)
+    next(chunks)
+    assert Baz.built == 0
+    xml = ''.join(chunks)
+    assert Baz.built == 1
+    assert ''.join(elem.iterxml()).startswith('<ogc:Foo xmlns:gml="http://www.opengis.net/gml" xmlns:ogc=')
+    # Namespaces which are not declared by the root element are kept
+    assert re.search(r'<gml:Point xmlns:(\w+)="http://www.w3.org/1999/xlink" \1:href="#a"><gml:pos>1 2</gml:pos></gml:Point></ogc:Foo>$', xml)
+    assert re.search(r'<gml:Point (\w+):href="#a"><gml:pos>1 2</gml:pos></gml:Point></ogc:Foo>$', ''.join(elem.iterxml(True)))
+
+
+def test_ElemAbstract_slots():
+    class Baz(ElemAbstract):
+        __slots__ = ()
+        nameSpace = 'ogc'
+        tagName = 'Baz'
+
+    elem = Baz()
+    assert not hasattr(elem, '__dict__')
+    assert elem._children is None and elem._attrib is None  # Created on first use
+    assert elem.xml() == '<ogc:Baz xmlns:ogc="http://www.opengis.net/ogc" />'
+    assert ''.join(elem.iterxml()) == elem.xml()
+    assert elem._children is None and elem._attrib is None
+
+    elem.attrib['foo'] = 'bar'
+    assert elem.xml(True) == '<ogc:Baz foo="bar" />'
+    assert elem.NAMESPACES is Baz().NAMESPACES
+
+    with pytest.raises(AttributeError):
+        elem.foo = 'bar'
@@ -3,6 +3,8 @@ import pytest
 import re
 import xml.etree.ElementTree as ET
 
+from ..base import SLDConfig
+from .. import gml as gml_module
 from ..gml import Geometry
 
 
@@ -98,6 +100,49 @@ def test_Geometry_parse_gml():
 
 
 
+def test_Geometry_lazy():
+    gml = '<gml:Point><gml:coordinates>45.67,88.56</gml:coordinates></gml:Point>'
+    geom = Geometry(gml)
+    assert geom.source == gml
+    assert geom._ogr is None and not geom._etree
+
+    root = geom.etree()
+    assert root.tag == '{http://www.opengis.net/gml}Point'
+    assert geom.etree() is root
+    assert geom.etree(SLDConfig()) is root
+
+    # Illegal sources are only detected when they are used
+    geom = Geometry('<gml:Foo />')
+    with pytest.raises(ValueError):
+        geom.etree()
+
+
+def test_Geometry_etree_source(monkeypatch):
+    # With GDAL, GML sources of the requested version are serialised without building OGR geometries
+    class Converted(Exception):
+        pass
+
+    def ogr(self):
+        raise Converted()
+
+    monkeypatch.setattr(gml_module, '_gdal_available', lambda: True)
+    monkeypatch.setattr(Geometry, 'ogr', property(ogr))
+
+    gml = '<gml:Point srsName="EPSG:4326"><gml:coordinates>45.67,88.56</gml:coordinates></gml:Point>'
+    geom = Geometry(gml)
+    assert ET.tostring(geom.etree(), encoding='unicode') == gml.replace(' srsName', ' xmlns:gml="http://www.opengis.net/gml" srsName')
+    with pytest.raises(Converted):
+        geom.etree(SLDConfig(sld_ver=SLDConfig.SLD2))  # GML 3
+
+    geom = Geometry(ET.fromstring('<gml:Point xmlns:gml="http://www.opengis.net/gml"><gml:pos>45.67 88.56</gml:pos></gml:Point>'))
+    assert geom.etree(SLDConfig(sld_ver=SLDConfig.SLD2)) is geom.source
+    with pytest.raises(Converted):
+        geom.etree()
+
+    with pytest.raises(Converted):
+        Geometry('POINT (45.67 88.56)').etree()
+
+
 
 # def test_OgrWrapper_gml2():
     # wrapper = OgrWrapper('POLYGON ((35 10, 45 45, 15 40, 10 20, 35 10),(20 30, 35 35, 30 20, 20 30))', 3857)
@@ -0,0 +1,96 @@
+import io
+import sys
+import xml.etree.ElementTree as ET
+import pytest
+
+from ..loader import from_xml, iter_filters
+from ..ogc import (
+    Literal, PropertyName, PropertyIsEqualTo, PropertyIsLessThan, PropertyIsBetween, PropertyIsLike, PropertyIsNull,
+    Intersects,
+)
+from ..ogc.logic_ops import And, Or, Not
+
+from .utils import flatten_xml
+
+
+op = And(
+    PropertyIsEqualTo(PropertyName('int_field'), 13),
+    Or(PropertyIsLike('string_field', '%Main%', matchCase=False), Not(PropertyIsNull('null_field'))),
+    PropertyIsBetween(PropertyName('float_field'), 1, Literal(4) * 2),
+    PropertyIsLessThan(PropertyName('int_field') + 1.5, 3 / PropertyName('float_field'), matchCase=False),
+    Intersects('geom_field', '<gml:Point srsName="EPSG:4326"><gml:coordinates>1,2</gml:coordinates></gml:Point>'),
+)
+
+sld = flatten_xml(
+    f'''
+    <?xml version="1.0" encoding="UTF-8"?>
+    <sld:StyledLayerDescriptor xmlns:sld="http://www.opengis.net/sld" xmlns:ogc="http://www.opengis.net/ogc" xmlns:gml="http://www.opengis.net/gml">
+        <sld:NamedLayer>
+            <sld:Rule>
+                <sld:Name>first</sld:Name>
+                <ogc:Filter>{op.xml(True)}</ogc:Filter>
+            </sld:Rule>
+            <!-- comment -->
+            <sld:Rule>
+                <ogc:Filter>
+                    <ogc:PropertyIsLike wildCard="*" singleChar="." escape="!">
+                        <ogc:PropertyName> string_field </ogc:PropertyName>
+                        <ogc:Literal>*foo!*</ogc:Literal>
+                    </ogc:PropertyIsLike>
+                </ogc:Filter>
+            </sld:Rule>
+        </sld:NamedLayer>
+    </sld:StyledLayerDescriptor>
+    '''
+)
+
+
+@pytest.fixture(params=['lxml', 'ElementTree'])
+def parser(request, monkeypatch):
+    if request.param == 'ElementTree':
+        monkeypatch.setitem(sys.modules, 'lxml', None)
+    else:
+        pytest.importorskip('lxml')
+    return request.param
+
+
+def test_from_xml(parser):
+    assert from_xml(op.xml()).xml() == op.xml()
+    assert from_xml(op.xml().encode('utf-8')).xml() == op.xml()
+    assert from_xml(io.BytesIO(op.xml().encode('utf-8'))).xml() == op.xml()
+    assert from_xml(ET.fromstring(op.xml())).xml() == op.xml()
+
+    # ogc:Filter is unwrapped
+    filter_xml = f'<ogc:Filter xmlns:gml="http://www.opengis.net/gml" xmlns:ogc="http://www.opengis.net/ogc">{op.xml(True)}</ogc:Filter>'
+    assert from_xml(filter_xml).xml() == op.xml()
+
+    with pytest.raises(ValueError):
+        from_xml(sld)
+
+    with pytest.raises(ValueError):
+        from_xml('<ogc:BBOX xmlns:ogc="http://www.opengis.net/ogc"><ogc:PropertyName>a</ogc:PropertyName></ogc:BBOX>')
+
+    with pytest.raises(ValueError, match='Unsupported element'):
+        from_xml('<ogc:Intersects xmlns:ogc="http://www.opengis.net/ogc"><ogc:PropertyName>a</ogc:PropertyName><ogc:Literal>b</ogc:Literal></ogc:Intersects>')
+
+    with pytest.raises(ValueError):
+        from_xml('<ogc:Not xmlns:ogc="http://www.opengis.net/ogc"><ogc:Literal>a</ogc:Literal></ogc:Not>')
+
+    with pytest.raises(ValueError):
+        from_xml('<ogc:PropertyIsNull xmlns:ogc="http://www.opengis.net/ogc"><ogc:Literal>a</ogc:Literal></ogc:PropertyIsNull>')
+
+
+def test_iter_filters(parser, tmp_path):
+    path = tmp_path / 'test.sld'
+    path.write_text(sld, encoding='utf-8')
+
+    for source in [sld, path, str(path), ET.fromstring(sld)]:
+        filters = list(iter_filters(source))
+        assert len(filters) == 2
+        assert filters[0].xml() == op.xml()
+
+        like = filters[1]
+        assert type(like) == PropertyIsLike
+        assert (like.wildCard, like.singleChar, like.escapeChar) == ('*', '.', '!')
+        assert like.propertyName.text == 'string_field'
+        assert like.simulate({ 'string_field': 'a foo*' }) is True
@@ -1,7 +1,9 @@
 import datetime
+import pickle
+import pytest
 from pytest import approx
 
-from ..ogc import Literal, PropertyName
+from ..ogc import Literal, PropertyName, PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsLike
 
 
 def test_Literal():
@@ -68,4 +70,50 @@ def test_PropertyName():
     assert elem.simulate(data) is None
     
     
-    
\ No newline at end of file
+    
+
+def test_shared():
+    assert Literal.shared(13) is Literal.shared('13')
+    assert Literal.shared(13) is not Literal.shared(13.0)
+    assert PropertyName.shared('int_field') is PropertyName.shared('int_field')
+    assert PropertyName.shared('13') is not Literal.shared('13')
+
+    op = PropertyIsEqualTo(PropertyName('int_field'), 13) | PropertyIsEqualTo(PropertyName('int_field'), '13')
+    xml = op.xml()
+    assert op.share_expressions() is op
+    assert op.xml() == xml
+    assert op.conditions[0].expr0 is op.conditions[1].expr0 is PropertyName.shared('int_field')
+    assert op.conditions[0].expr1 is op.conditions[1].expr1
+
+    # Shared instances belong to every filter using them, hence cannot be modified
+    like1, like2 = PropertyIsLike('string_field', '%foo%'), PropertyIsLike('string_field', '%foo%')
+    (like1 | like2).share_expressions()
+    with pytest.raises(AttributeError):
+        like1.pattern.text = '%bar%'
+    with pytest.raises(AttributeError):
+        pickle.loads(pickle.dumps(like1)).pattern.text = '%bar%'
+    like1.pattern = '%bar%'
+    assert like2.pattern.text == '%foo%'
+
+    # Only shared instances are frozen, and they are serialised and compared like plain ones
+    literal = Literal('foo')
+    literal.text = 'bar'
+    assert type(literal) == Literal
+    assert isinstance(like2.pattern, Literal)
+    assert like2.pattern.xml(no_xmlns=True) == '<ogc:Literal>%foo%</ogc:Literal>'
+    assert like2.structure_key() == PropertyIsLike('string_field', '%foo%').structure_key()
+    assert type(like2.pattern).shared('%foo%') is like2.pattern
+
+
+def test_structure_key():
+    op1 = PropertyIsEqualTo(PropertyName('int_field'), 13) & PropertyIsLike('string_field', '%foo%', matchCase=False)
+    op2 = PropertyIsEqualTo(PropertyName('int_field'), '13') & PropertyIsLike('string_field', '%foo%', matchCase=False)
+    assert op1.structure_key() == op2.structure_key()
+    assert len({op1.structure_key(), op2.structure_key()}) == 1
+
+    op2.conditions[1].matchCase = True
+    assert op1.structure_key() != op2.structure_key()
+
+    assert PropertyIsEqualTo(1, 2).structure_key() != PropertyIsEqualTo(2, 1).structure_key()
+    assert PropertyIsEqualTo(1, 2).structure_key() != PropertyIsNotEqualTo(1, 2).structure_key()
+    assert Literal('a').structure_key() != PropertyName('a').structure_key()
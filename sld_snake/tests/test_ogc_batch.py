@@ -0,0 +1,99 @@
+import datetime
+from itertools import product
+import pytest
+
+from ..ogc import (
+    Add, Sub, Mul, Div, Literal, PropertyName,
+    PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsGreaterThan, PropertyIsGreaterThanOrEqualTo,
+    PropertyIsLessThan, PropertyIsLessThanOrEqualTo, PropertyIsBetween, PropertyIsLike, PropertyIsNull,
+)
+from .utils import outcome
+
+np = pytest.importorskip('numpy')
+
+
+features = [
+    { 'int_field': 13, 'float_field': 1.4142, 'string_field': ' foo bar ', 'mixed_field': 13 },
+    { 'int_field': 0, 'float_field': float('nan'), 'string_field': '13', 'mixed_field': None },
+    { 'int_field': -7, 'float_field': 16.0, 'string_field': '', 'mixed_field': 'true' },
+    { 'int_field': 16, 'float_field': -0.0, 'string_field': 'NaN', 'mixed_field': True },
+    { 'int_field': 2, 'float_field': float('inf'), 'string_field': 'foo', 'mixed_field': datetime.date(2008, 4, 3) },
+]
+
+columns = {
+    'int_field': np.array([f['int_field'] for f in features]),
+    'float_field': np.array([f['float_field'] for f in features]),
+    'string_field': np.array([f['string_field'] for f in features]),
+    'mixed_field': [f['mixed_field'] for f in features],
+}
+
+operands = [PropertyName(key) for key in columns] + [
+    Literal(13), Literal(' 2 '), Literal(0), Literal('NaN'), Literal('true'), Literal('foo'), Literal('2008-04-03'),
+]
+
+
+def expected(op):
+    # simulate() applied feature by feature
+    results = [outcome(op.simulate, feature) for feature in features]
+    if any(isinstance(result, type) for result in results):
+        return next(result for result in results if isinstance(result, type))
+    return results
+
+
+def test_simulate_batch_arithmetic_ops():
+    for klass, expr0, expr1 in product([Add, Sub, Mul, Div], operands, operands):
+        op = klass(expr0, expr1)
+        result = outcome(op.simulate_batch, columns)
+        reference = expected(op)
+        if isinstance(reference, type):
+            assert result is reference
+        else:
+            result = np.broadcast_to(result, (len(features),))
+            assert np.allclose(result, reference, equal_nan=True)
+
+    assert Div(PropertyName('int_field'), 0).simulate_batch(columns).tolist() == [float('inf')] * len(features)
+    assert Div(0, PropertyName('int_field')).simulate_batch(columns)[1] == float('inf')
+
+
+def test_simulate_batch_comparison_ops():
+    klasses = [
+        PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsGreaterThan, PropertyIsGreaterThanOrEqualTo,
+        PropertyIsLessThan, PropertyIsLessThanOrEqualTo,
+    ]
+    for klass, expr0, expr1 in product(klasses, operands, operands):
+        op = klass(expr0, expr1)
+        result = outcome(op.simulate_batch, columns)
+        reference = expected(op)
+        if isinstance(reference, type):
+            assert result is reference
+        else:
+            assert result.dtype == bool
+            assert result.tolist() == reference
+
+    op = PropertyIsBetween(PropertyName('float_field'), 0, PropertyName('int_field'))
+    assert op.simulate_batch(columns).tolist() == expected(op) == [True, False, False, True, False]
+
+    op = PropertyIsLike('string_field', '%foo%')
+    assert op.simulate_batch(columns).tolist() == expected(op)
+
+    op = PropertyIsNull('mixed_field')
+    assert op.simulate_batch(columns).tolist() == expected(op)
+
+
+def test_simulate_batch_logic_ops():
+    op1 = PropertyIsGreaterThan(PropertyName('int_field'), 1)
+    op2 = PropertyIsLike(PropertyName('string_field'), '%foo%')
+    op3 = PropertyIsNull('mixed_field')
+
+    for logic in [op1 & op2, op1 | op3, ~op1, ~(op2 | op3) & op1]:
+        assert logic.simulate_batch(columns).tolist() == expected(logic)
+
+    # Like And.simulate(), later conditions are not evaluated once a row is rejected
+    op4 = PropertyIsEqualTo(PropertyName('mixed_field'), 'foo')  # raises for True
+    with pytest.raises(ValueError):
+        op4.simulate_batch(columns)
+    logic = PropertyIsLessThan(PropertyName('int_field'), 1) & op4
+    assert logic.simulate_batch(columns).tolist() == expected(logic) == [False] * len(features)
+
+    with pytest.raises(ValueError):
+        (op1 & op2).simulate_batch({})
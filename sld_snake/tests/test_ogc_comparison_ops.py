@@ -1,15 +1,17 @@
 import datetime
+from itertools import product
 import pytest
 import re
 import sre_constants
 from ..base import SLDConfig
 from ..ogc import (
     PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsGreaterThan, PropertyIsGreaterThanOrEqualTo, 
-    PropertyIsLessThan, PropertyIsLessThanOrEqualTo, PropertyIsBetween, PropertyName, PropertyIsLike, PropertyIsNull
+    PropertyIsLessThan, PropertyIsLessThanOrEqualTo, PropertyIsBetween, PropertyName, PropertyIsLike, PropertyIsNull,
+    Literal,
 )
-from ..ogc.comparison_ops import BinaryComparisonOp
+from ..ogc.comparison_ops import BinaryComparisonOp, LowerBoundary, UpperBoundary
 
-from .utils import flatten_xml
+from .utils import flatten_xml, outcome
 
 
 data = {
@@ -145,8 +147,38 @@ def test_PropertyIsLike():
     assert op.simulate(data) is False
     op.propertyName = 'datetime_field'
     assert op.simulate(data) is True
-    
-    
+
+
+def test_PropertyIsLike_matcher():
+    op = PropertyIsLike('string_field', '%foo%')
+    matcher = op.matcher
+    assert op.matcher is matcher
+    assert op.simulate(data) is True
+
+    # The cached matcher is rebuilt whenever the pattern, special characters or matchCase change
+    op.pattern.text = '%FOO%'
+    assert op.matcher is not matcher
+    assert op.simulate(data) is False
+    op.matchCase = False
+    assert op.simulate(data) is True
+    op.matchCase = True
+    op.wildCard = '*'
+    assert op.simulate(data) is False
+    op.pattern = '*foo*'
+    assert op.simulate(data) is True
+    op.escapeChar = '*'
+    with pytest.raises(ValueError):
+        op.simulate(data)
+
+    # Simple patterns agree with the regular expression
+    values = ['', 'foo', 'Foo', 'foobar', 'barfoo', 'barfoobar', 'fo', 'foo\n', 'foo\nbar', '\nfoo']
+    patterns = ['foo', 'foo%', '%foo', '%foo%', '%%foo%%', '%', '', 'f%o', 'fo_', 'foo\\%']
+    for pattern, value, matchCase in product(patterns, values, [True, False]):
+        op = PropertyIsLike('field', pattern, matchCase=matchCase)
+        expected = re.match(op.regex, value, 0 if matchCase else re.I) is not None
+        assert op.simulate({ 'field': value }) is expected
+
+
 
 def test_PropertyIsNull():
     op = PropertyIsNull('null_field')
@@ -637,6 +669,23 @@ def test_PropertyIsBetween():
     assert op.simulate(data) is False  # -1 <= 1.4142 <= 1.3
 
 
+def test_PropertyIsBetween_range(capsys):
+    boundaries = ['0', '13', '1.4142', '-Infinity', 'NaN', 'true', 'foo', '', '2008-04-03']
+    features = [data, { key: str(value) for key, value in data.items() }]
+    for key, lower, upper, feature in product(data, boundaries, boundaries, features):
+        op = PropertyIsBetween(PropertyName(key), lower, upper)
+        test1 = PropertyIsGreaterThanOrEqualTo(PropertyName(key), lower)
+        test2 = PropertyIsLessThanOrEqualTo(PropertyName(key), upper)
+        expected = outcome(lambda: test1.simulate(feature) and test2.simulate(feature))
+        assert outcome(op.simulate, feature) == outcome(op.compile(), feature) == expected
+
+    # Boundaries can be given as such
+    op = PropertyIsBetween(PropertyName('int_field'), LowerBoundary(13), UpperBoundary(PropertyName('int_field')))
+    assert type(op.lowerBoundary.expr0) == Literal
+    assert op.simulate(data) is op.compile()(data) is True
+    assert capsys.readouterr().out == ''
+
+
 def test_AND_overloading():
     op1 = PropertyIsEqualTo(PropertyName('int_field'), 13)  # True
     op2 = PropertyIsLike(PropertyName('string_field'), '%foo%')   # True
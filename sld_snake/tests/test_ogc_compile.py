@@ -0,0 +1,190 @@
+import datetime
+from itertools import product
+import math
+import pytest
+
+from ..ogc import (
+    Add, Sub, Mul, Div, Literal, PropertyName,
+    PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsGreaterThan, PropertyIsGreaterThanOrEqualTo,
+    PropertyIsLessThan, PropertyIsLessThanOrEqualTo, PropertyIsBetween, PropertyIsLike, PropertyIsNull,
+)
+from ..ogc.logic_ops import LogicOpAbstract, And, Or
+from .utils import outcome
+
+
+data = {
+    'string_field': ' foo bar ',
+    'numeric_string_field': ' 13 ',
+    'int_field': 13,
+    'float_field': 1.4142,
+    'date_field': datetime.date(2008, 4, 3),
+    'datetime_field': datetime.datetime(2012, 12, 4, 13, 44, 25),
+    'null_field': None,
+    'zero_field': 0,
+    'empty_field': '',
+    'true_field': True,
+    'false_field': False,
+    'nan_field': float('nan'),
+}
+
+operands = [PropertyName(key) for key in data] + [
+    Literal(13), Literal(' 13 '), Literal(1.4142), Literal('NaN'), Literal('-Infinity'), Literal('true'),
+    Literal('foo'), Literal(''), Literal('2008-04-03'), Literal('2012-12-04T11:14:25-02:30'),
+]
+
+
+def assert_same(result, expected):
+    if isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(result)
+    else:
+        assert result == expected
+
+
+def test_compile_Literal_PropertyName():
+    assert Literal(42).compile()(data) == '42'
+    assert PropertyName('int_field').compile()(data) == 13
+
+    with pytest.raises(ValueError):
+        PropertyName('no_such_field').compile()(data)
+
+    with pytest.raises(TypeError):
+        PropertyName('int_field').compile()(None)
+
+
+def test_compile_arithmetic_ops():
+    for klass, expr0, expr1 in product([Add, Sub, Mul, Div], operands, operands):
+        op = klass(expr0, expr1)
+        assert_same(outcome(op.compile(), data), outcome(op.simulate, data))
+
+    # Division by zero follows simulate()
+    assert Div(PropertyName('int_field'), 0).compile()(data) == float('inf')
+
+
+def test_compile_comparison_ops():
+    klasses = [
+        PropertyIsEqualTo, PropertyIsNotEqualTo, PropertyIsGreaterThan, PropertyIsGreaterThanOrEqualTo,
+        PropertyIsLessThan, PropertyIsLessThanOrEqualTo,
+    ]
+    for klass, expr0, expr1 in product(klasses, operands, operands):
+        op = klass(expr0, expr1)
+        assert outcome(op.compile(), data) == outcome(op.simulate, data)
+
+    for key in data:
+        op = PropertyIsNull(key)
+        assert op.compile()(data) is op.simulate(data)
+
+        for pattern in ['%foo%', '%F__ _ar ', '1_', '%']:
+            op = PropertyIsLike(key, pattern, matchCase=False)
+            assert op.compile()(data) is op.simulate(data)
+
+    op = PropertyIsBetween(PropertyName('float_field'), -1, Literal(16) / 10)
+    assert op.compile()(data) is op.simulate(data) is True
+    op.upperBoundary -= 0.3
+    assert op.compile()(data) is op.simulate(data) is False
+
+
+def test_compile_logic_ops():
+    op1 = PropertyIsEqualTo(PropertyName('int_field'), 13)  # True
+    op2 = PropertyIsLike(PropertyName('string_field'), '%foo%')   # True
+    op3 = PropertyIsLessThan(PropertyName('float_field'), 1.4)  # False
+    op4 = PropertyIsNull(PropertyName('null_field'))  # True
+
+    for logic in [op1 & op2, op1 & op3, op3 | op4, op3 | ~op4, ~(op1 & op2 & op4), (op1 | op3) & ~op3]:
+        assert logic.compile()(data) is logic.simulate(data)
+
+    # A compiled filter is a snapshot of the tree at the time of compilation
+    logic = op1 & op2
+    func = logic.compile()
+    logic &= op3
+    assert func(data) is True
+    assert logic.compile()(data) is False
+
+
+def test_compile_Or_equalities():
+    texts = ['13', '1.0', ' 2 ', 'NaN', '-Infinity', 'foo', '', 'true', '2008-04-03', 'inf']
+    for values in [texts, texts[:2], ['foo', 'bar'], ['13', ' 13 ']]:
+        op = Or(*[PropertyIsEqualTo(PropertyName('string_field'), Literal(value)) for value in values])
+        func = op.compile()
+        for value in data.values():
+            for feature in [{ 'string_field': value }, { 'string_field': str(value) }]:
+                assert outcome(func, feature) == outcome(op.simulate, feature)
+
+    # Only equalities on the same property are looked up
+    op = Or(PropertyIsEqualTo(PropertyName('int_field'), 13), PropertyIsEqualTo(PropertyName('float_field'), 13))
+    assert op.compile()(data) is True
+    op = Or(PropertyIsEqualTo(PropertyName('int_field'), 12), PropertyIsLessThan(PropertyName('int_field'), 13))
+    assert op.compile()(data) is False
+
+
+class Slow(LogicOpAbstract):
+    # Expensive condition which passes most features, and counts its evaluations
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def compile(self):
+        def simulate(data, config=None):
+            self.calls += 1
+            sum(range(2000))
+            return data['int_field'] != 0
+        return simulate
+
+    def _safe_properties(self):
+        # Never raises for features with an int_field (dict access and comparison only)
+        return frozenset(['int_field'])
+
+
+def test_compile_adaptive():
+    # 'code' is only read when Slow passes: evaluated first, the equality raises for the others
+    features = [{ 'int_field': i % 10, 'code': i % 7 } if i % 10 else { 'int_field': 0 } for i in range(10000)]
+
+    for make in [
+        lambda slow: slow & PropertyIsEqualTo(PropertyName('code'), 3),
+        lambda slow: (~slow | PropertyIsGreaterThan(PropertyName('code'), 0)) & ~PropertyIsNull('int_field'),
+    ]:
+        slow = Slow()
+        expected = [make(slow).compile()(feature) for feature in features]
+        assert slow.calls == len(features)
+
+        slow = Slow()
+        func = make(slow).compile(adaptive=True)
+        assert [func(feature) for feature in features] == expected
+        assert slow.calls < len(features) / 2
+
+    # Exceptions are raised when they would be without reordering
+    func = Or(PropertyIsEqualTo(PropertyName('code'), 3), PropertyIsNull('int_field')).compile(adaptive=True)
+    for feature in features[:2000]:
+        if 'code' in feature:
+            assert func(feature) is (feature['code'] == 3)
+        else:
+            with pytest.raises(ValueError):
+                func(feature)
+
+    # Conditions moved first do not hide the exceptions of the skipped ones
+    features = [{ 'name': f'street {i}', 'flag': i % 4, 'value': 'true' if i % 5 else 'foo' } for i in range(5000)]
+    features += [{ 'flag': 0 }, { 'flag': 1 }, { 'name': 'a', 'flag': True, 'value': 'foo' }] * 100
+    for op in [
+        PropertyIsLike('name', '%street%_1%', matchCase=False) | PropertyIsEqualTo(PropertyName('flag'), 0),
+        PropertyIsLike('name', '%street%_1%', matchCase=False) & PropertyIsEqualTo(PropertyName('flag'), 1),
+        PropertyIsEqualTo(PropertyName('flag'), PropertyName('value')) & PropertyIsEqualTo(PropertyName('flag'), 1),
+    ]:
+        strict, func = op.compile(), op.compile(adaptive=True)
+        assert [outcome(func, feature) for feature in features] == [outcome(strict, feature) for feature in features]
+        assert ValueError in [outcome(func, feature) for feature in features]
+
+    # Once the cheap condition is moved first, a value for which a skipped condition raises
+    op = PropertyIsEqualTo(PropertyName('flag'), 'maybe') & PropertyIsEqualTo(PropertyName('code'), 1)
+    slow = Slow()
+    for op in [op, slow & PropertyIsEqualTo(PropertyName('code'), 1)]:
+        strict, func = op.compile(), op.compile(adaptive=True)
+        for i in range(5000):
+            feature = { 'flag': 'x', 'code': i % 50, 'int_field': 1 }
+            assert func(feature) is strict(feature)
+        for feature in [
+            { 'flag': True, 'code': 0, 'int_field': 1 },
+            { 'flag': datetime.date(2008, 4, 3), 'code': 0, 'int_field': 1 },
+            { 'flag': 'x', 'code': 0, 'int_field': 2 ** 1024 },
+            { 'flag': 'x', 'code': 0, 'int_field': [] },
+        ]:
+            assert outcome(func, feature) == outcome(strict, feature)
+    assert slow.calls < 2 * 5000  # The slow condition was moved after the equality
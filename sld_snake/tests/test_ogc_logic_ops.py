@@ -1,5 +1,6 @@
+from collections import OrderedDict
 import pytest
-from ..ogc.logic_ops import LogicDict
+from ..ogc.logic_ops import LogicDict, Or
 from ..ogc import PropertyIsEqualTo, PropertyName
 
 
@@ -36,3 +37,31 @@ def test_LogicDict():
     del logdic[1]
     assert list(logdic.keys()) == [0]
     assert list(logdic.values()) == [logic0]
+
+    with pytest.raises(KeyError):
+        logdic[2] = logic1  # Keys are positions: 0 <= key <= len(logdic)
+
+    logdic.prepend(logic1)
+    logdic.append(logic2)
+    logdic.extend([logic0, logic1])
+    assert list(logdic.items()) == [(0, logic1), (1, logic0), (2, logic2), (3, logic0), (4, logic1)]
+    assert list(reversed(logdic.values())) == [logic1, logic0, logic2, logic0, logic1]
+    assert 4 in logdic and 5 not in logdic and '0' not in logdic
+    assert logdic.get(5) is None
+    assert LogicDict(logdic.items()) == logdic
+
+    with pytest.raises(TypeError):
+        logdic.prepend(prop)
+
+
+def test_BinaryLogicOp_conditions():
+    conds = [PropertyIsEqualTo(PropertyName('field'), i) for i in range(5)]
+    op = Or(conds[3], conds[4])
+    for cond in reversed(conds[:3]):
+        op.prepend_condition(cond)
+    assert type(op.conditions) == LogicDict
+    assert list(op.conditions.values()) == conds
+
+    op.conditions = OrderedDict(enumerate(conds[:2]))
+    assert type(op.conditions) == LogicDict
+    assert op.xml() == Or(*conds[:2]).xml()
@@ -1,5 +1,6 @@
 from itertools import product
 
+from ..base import SLDConfig
 from ..ogc import PropertyName, Equals, Disjoint, Touches, Within, Overlaps, Crosses, Intersects, Contains
 from .utils import flatten_xml
 
@@ -327,3 +328,94 @@ def test_Intersects(subtests):
 
 
 
+
+
+def test_BinarySpatialOp_filter_geometry_cache():
+    op = Intersects('geom', poly0)
+    assert op.simulate({ 'geom': poly1 }) is True
+    filter_ogr = op._filter_ogr
+    assert filter_ogr is not None
+
+    assert op.simulate({ 'geom': poly3 }) is False
+    assert op._filter_ogr is filter_ogr
+
+    # Replacing the geometry invalidates the cache
+    op.geometry = poly3
+    assert op._filter_ogr is None
+    assert op.simulate({ 'geom': poly3 }) is True
+
+
+def test_BinarySpatialOp_envelope_stats():
+    # Results of the envelope shortcuts must agree with the full predicates
+    all_geoms = [poly0, poly1, poly2, poly3, poly4, line0, line1, line2, line3, line4, point0, point1, point2]
+    predicates = {
+        Equals: 'equals', Disjoint: 'disjoint', Touches: 'touches', Within: 'within',
+        Overlaps: 'overlaps', Crosses: 'crosses', Intersects: 'intersects', Contains: 'contains',
+    }
+    for klass, method in predicates.items():
+        for geom1 in all_geoms:
+            op = klass('geom', geom1)
+            for geom0 in all_geoms:
+                ogr0 = op._simulate_wrapper(PropertyName('geom'), { 'geom': geom0 })
+                expected = getattr(ogr0, method)(op._simulate_geometry())
+                assert op.simulate({ 'geom': geom0 }) is expected
+            assert op.envelope_hits + op.envelope_misses == len(all_geoms)
+
+    op = Intersects('geom', poly0)
+    assert (op.envelope_hits, op.envelope_misses) == (0, 0)
+
+    assert op.simulate({ 'geom': poly3 }) is False  # Envelopes are apart
+    assert (op.envelope_hits, op.envelope_misses) == (1, 0)
+
+    assert op.simulate({ 'geom': poly2 }) is True  # Envelopes touch
+    assert (op.envelope_hits, op.envelope_misses) == (1, 1)
+
+    op.reset_envelope_stats()
+    assert (op.envelope_hits, op.envelope_misses) == (0, 0)
+
+
+def test_BinarySpatialOp_reprojection_cache():
+    op = Intersects('geom', f'SRID=4326;{poly0}')
+    data1 = { 'geom': 'SRID=27700;Point(100 100)' }
+    data2 = { 'geom': 'SRID=27700;Point(200 200)' }
+    assert op.simulate(data1) is op.simulate(data2)
+    assert len(op._reprojected) == 1
+    reprojected = list(op._reprojected.values())[0]
+
+    op.simulate(data2)
+    assert list(op._reprojected.values()) == [reprojected]
+
+    # Features in the same CRS as the filter use the filter geometry as is
+    assert op.simulate({ 'geom': f'SRID=4326;{point2}' }) is True
+    assert len(op._reprojected) == 1
+
+    op.simulate({ 'geom': 'SRID=3857;Point(100 100)' })
+    assert len(op._reprojected) == 2
+
+    op.geometry = poly1
+    assert op._reprojected == {}
+
+
+def test_BinarySpatialOp_gml_version():
+    op = Intersects('geom', point0)
+    assert op.xml(True) == flatten_xml(
+        '''
+        <ogc:Intersects>
+            <ogc:PropertyName>geom</ogc:PropertyName>
+            <gml:Point><gml:coordinates>4,0</gml:coordinates></gml:Point>
+        </ogc:Intersects>
+        '''
+    )
+
+    # SLD 1.1 uses GML 3
+    config = SLDConfig(sld_ver=SLDConfig.SLD2)
+    assert op.xml(True, config) == flatten_xml(
+        '''
+        <ogc:Intersects>
+            <ogc:PropertyName>geom</ogc:PropertyName>
+            <gml:Point><gml:pos>4 0</gml:pos></gml:Point>
+        </ogc:Intersects>
+        '''
+    )
+    assert ''.join(op.iterxml(True, config)) == op.xml(True, config)
+    assert op.geometry.etree(config) is op.geometry.etree(config)
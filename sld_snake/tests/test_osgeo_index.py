@@ -0,0 +1,58 @@
+import random
+import pytest
+
+from ..ogc import PropertyName, PropertyIsEqualTo, Equals, Disjoint, Touches, Within, Overlaps, Crosses, Intersects, Contains
+from ..osgeo.index import STRtree, FeatureIndex
+
+
+def test_STRtree():
+    rand = random.Random(20200501)
+    envelopes = []
+    for _ in range(1000):
+        x, y = rand.uniform(-180, 180), rand.uniform(-90, 90)
+        envelopes.append((x, x + rand.uniform(0, 5), y, y + rand.uniform(0, 5)))
+
+    for capacity in [2, 4, 10, 1000]:
+        tree = STRtree(envelopes, node_capacity=capacity)
+        assert len(tree) == 1000
+        for _ in range(50):
+            x, y = rand.uniform(-180, 180), rand.uniform(-90, 90)
+            query = (x, x + rand.uniform(0, 30), y, y + rand.uniform(0, 30))
+            expected = [
+                i for i, env in enumerate(envelopes)
+                if env[0] <= query[1] and query[0] <= env[1] and env[2] <= query[3] and query[2] <= env[3]
+            ]
+            assert tree.query(query) == expected
+
+    # Envelopes touching at the edge intersect
+    tree = STRtree([(0, 1, 0, 1), (2, 3, 2, 3)])
+    assert tree.query((1, 2, 1, 2)) == [0, 1]
+    assert tree.query((1.5, 1.6, 0, 5)) == []
+
+    assert STRtree([]).query((0, 1, 0, 1)) == []
+
+    with pytest.raises(ValueError):
+        STRtree(envelopes, node_capacity=1)
+
+
+def test_FeatureIndex():
+    features = [
+        { 'id': i, 'geom': f'Polygon(({x} {y}, {x + 2} {y}, {x + 2} {y + 2}, {x} {y + 2}, {x} {y}))' }
+        for i, (x, y) in enumerate((x, y) for x in range(-10, 10, 3) for y in range(-10, 10, 3))
+    ]
+    features += [{ 'id': 'line', 'geom': 'LineString(0 0, 5 5)' }, { 'id': 'point', 'geom': 'Point(2 2)' }]
+    index = FeatureIndex(features, 'geom', node_capacity=4)
+    assert len(index) == len(features)
+
+    poly = 'Polygon((0 0, 5 0, 5 5, 0 5, 0 0))'
+    for klass in [Equals, Disjoint, Touches, Within, Overlaps, Crosses, Intersects, Contains]:
+        op = klass('geom', poly)
+        assert index.evaluate(op) == [op.simulate(feature) for feature in features]
+        assert index.select(op) == [feature for feature in features if op.simulate(feature)]
+
+    # Features whose envelopes intersect the query envelope, like BBOX
+    assert [feature['id'] for feature in index.query((0.5, 0.6, 0.5, 0.6))] == [24, 'line']
+
+    # Non-spatial filters are evaluated feature by feature
+    op = PropertyIsEqualTo(PropertyName('id'), 3)
+    assert index.evaluate(op) == [feature['id'] == 3 for feature in features]
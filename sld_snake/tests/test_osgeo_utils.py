@@ -1,9 +1,11 @@
+from collections import OrderedDict
 import json
+import pickle
 import pytest
 import re
 import xml.etree.ElementTree as ET
 
-from ..osgeo.utils import OgrWrapper
+from ..osgeo.utils import OgrWrapper, SRSRegistry, SRS_REGISTRY
 
 
 def test_OgrWrapper_OgrWrapper():
@@ -179,4 +181,155 @@ def test_OgrWrapper_gml3():
     </gml:surfaceMember>
 </gml:MultiSurface>
         '''.strip()
-    )
\ No newline at end of file
+    )
+
+def test_OgrWrapper_prepare():
+    from osgeo import ogr
+
+    if not hasattr(ogr.Geometry, 'CreatePreparedGeometry'):
+        pytest.skip('GDAL built without prepared geometry support')
+
+    square = 'POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))'
+    inside = OgrWrapper('POINT (5 5)')
+    edge = OgrWrapper('LINESTRING (10 0, 20 0)')
+    outside = OgrWrapper('POINT (15 5)')
+
+    wrapper = OgrWrapper(square)
+    expected = [(wrapper.intersects(geom), wrapper.contains(geom)) for geom in (inside, edge, outside)]
+    assert expected == [(True, True), (True, False), (False, False)]
+
+    assert wrapper.prepared is False
+    assert wrapper.prepare() is wrapper
+    assert wrapper.prepared is True
+    prepared = wrapper._prepared
+    assert wrapper.prepare() is wrapper  # Idempotent
+    assert wrapper._prepared is prepared
+
+    # The predicates are evaluated by the prepared geometry, which is kept across calls
+    class Spy:
+        def __init__(self, prepared):
+            self.prepared = prepared
+            self.calls = []
+
+        def Intersects(self, geom):
+            self.calls.append('Intersects')
+            return self.prepared.Intersects(geom)
+
+        def Contains(self, geom):
+            self.calls.append('Contains')
+            return self.prepared.Contains(geom)
+
+    spy = wrapper._prepared = Spy(prepared)
+    assert [(wrapper.intersects(geom), wrapper.contains(geom)) for geom in (inside, edge, outside)] == expected
+    assert spy.calls == ['Intersects', 'Contains'] * 3
+    assert wrapper.prepare() is wrapper
+    assert wrapper._prepared is spy
+
+
+def test_OgrWrapper_caller_geometry():
+    from osgeo import ogr
+
+    # Changing the geometry given to the wrapper does not outdate what the wrapper has cached
+    geom = ogr.CreateGeometryFromWkt('LINESTRING (0 0, 10 10)')
+    wrapper = OgrWrapper(geom).prepare()
+    assert wrapper.envelope == (0, 10, 0, 10)
+    assert wrapper.spatial_ref_key is None
+
+    geom.AssignSpatialReference(SRS_REGISTRY.srs(27700))
+    geom.SetPoint_2D(0, 20, 20)
+    assert wrapper._ogr is not geom
+    assert wrapper.spatial_ref is None and wrapper.spatial_ref_key is None
+    assert wrapper.envelope == wrapper._ogr.GetEnvelope() == (0, 10, 0, 10)
+    assert wrapper.intersects('POINT (5 5)') is True
+    assert wrapper.envelope_intersects('POINT (15 15)') is False
+
+
+def test_OgrWrapper_pickle():
+    from osgeo import osr
+
+    wrapper = OgrWrapper('SRID=27700;POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))').prepare()
+    copy = pickle.loads(pickle.dumps(wrapper))
+    assert copy._ogr.Equals(wrapper._ogr)
+    assert copy.prepared is True
+    assert copy.is_same_srs(wrapper.spatial_ref) is True
+    assert copy.intersects('POINT (5 5)') is True
+
+    wrapper = OgrWrapper('LINESTRING (1 2, 3 4)')
+    copy = pickle.loads(pickle.dumps(wrapper))
+    assert copy.spatial_ref is None
+    assert copy.prepared is False
+    assert copy._ogr.ExportToWkt() == wrapper._ogr.ExportToWkt()
+
+    # CRS without an EPSG code
+    srs = osr.SpatialReference()
+    srs.SetFromUserInput('+proj=laea +lat_0=52 +lon_0=10 +x_0=4321000 +y_0=3210000 +ellps=GRS80 +units=m')
+    wrapper._ogr.AssignSpatialReference(srs)
+    copy = pickle.loads(pickle.dumps(wrapper))
+    assert copy.spatial_ref.IsSame(srs)
+
+
+def test_SRSRegistry():
+    registry = SRSRegistry(maxsize=2)
+    srs4326 = registry.srs(4326)
+    assert registry.srs(4326) is srs4326
+    assert srs4326.GetAuthorityCode(None) == '4326'
+
+    srs27700 = registry.srs(27700)
+    transform = registry.transformation(srs4326, srs27700)
+    assert registry.transformation(registry.srs(4326), registry.srs(27700)) is transform
+    assert registry.transformation(srs27700, srs4326) is not transform
+
+    assert registry.is_same(srs4326, registry.srs(4326)) is True
+    assert registry.is_same(srs4326, srs27700) is False
+
+    # The least recently used entry is evicted
+    registry.srs(3857)
+    registry.srs(27700)
+    registry.srs(2193)
+    assert registry.srs(4326) is not srs4326
+
+    with pytest.raises(ValueError):
+        registry.srs(999999)
+
+    registry.clear()
+    assert registry.srs(27700) is not srs27700
+
+    # Geometries share the SpatialReference of the global registry
+    wrapper1 = OgrWrapper('SRID=27700;POINT (1 2)')
+    wrapper2 = OgrWrapper('POINT (3 4)', 27700)
+    assert wrapper1.is_same_srs(wrapper2.spatial_ref) is True
+    assert SRS_REGISTRY.srs(27700).IsSame(wrapper1.spatial_ref)
+
+
+def test_SRSRegistry_keys(monkeypatch):
+    calls = []
+    key = SRSRegistry.key
+    monkeypatch.setattr(SRSRegistry, 'key', staticmethod(lambda srs: calls.append(srs) or key(srs)))
+
+    # The key of the CRS of a geometry is computed once
+    wrapper = OgrWrapper('SRID=27700;POINT (1 2)')
+    srs = SRS_REGISTRY.srs(27700)
+    srs_key = wrapper.srs_key(srs)
+    calls.clear()
+    for _ in range(3):
+        assert wrapper.is_same_srs(srs, srs_key) is True
+    assert wrapper.spatial_ref_key == srs_key
+    assert len(calls) == 1
+
+    assert OgrWrapper('POINT (1 2)').spatial_ref_key is None
+
+
+def test_SRSRegistry_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Concurrent lookups and evictions leave a consistent LRU behind
+    registry = SRSRegistry(maxsize=4)
+    cache = OrderedDict()
+
+    def lookup(i):
+        key = i % 7
+        return registry._get(cache, key, lambda: key) == key
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(lookup, range(20000)))
+    assert len(cache) <= 4
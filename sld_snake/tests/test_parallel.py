@@ -0,0 +1,30 @@
+import pytest
+
+from ..base import SLDConfig
+from ..ogc import PropertyName, PropertyIsEqualTo, PropertyIsGreaterThan, PropertyIsLike, PropertyIsNull
+from ..parallel import ParallelEvaluator
+
+
+features = [
+    { 'int_field': i, 'string_field': f'Main Street {i}' if i % 3 else 'Elm', 'null_field': None if i % 2 else i }
+    for i in range(100)
+]
+
+
+def test_ParallelEvaluator():
+    op = (PropertyIsGreaterThan(PropertyName('int_field'), 13) & PropertyIsLike('string_field', 'Main%')) | PropertyIsNull('null_field')
+    func = op.compile()  # Filters which have been used can be shipped as well
+    expected = [func(feature) for feature in features]
+
+    with ParallelEvaluator(op, config=SLDConfig(), max_workers=2, chunksize=7) as evaluator:
+        assert list(evaluator.evaluate(features)) == expected
+        assert list(evaluator.evaluate(iter(features))) == expected
+        assert list(evaluator.select(features)) == [feature for feature, result in zip(features, expected) if result]
+        assert list(evaluator.evaluate([])) == []
+
+    with ParallelEvaluator(PropertyIsEqualTo(PropertyName('no_such_field'), 1), max_workers=2) as evaluator:
+        with pytest.raises(ValueError):
+            list(evaluator.evaluate(features))
+
+    with pytest.raises(ValueError):
+        ParallelEvaluator(op, chunksize=0)
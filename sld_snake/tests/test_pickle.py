@@ -0,0 +1,48 @@
+import pickle
+
+from ..base import SLDConfig
+from ..gml import Geometry
+from ..ogc import (
+    Literal, PropertyName, PropertyIsEqualTo, PropertyIsBetween, PropertyIsLike, PropertyIsNull, Intersects,
+)
+from ..ogc.logic_ops import And, Or, Not
+
+
+data = { 'int_field': 13, 'string_field': ' foo bar ', 'float_field': 1.4142, 'null_field': None }
+
+
+def test_pickle():
+    like = PropertyIsLike('string_field', '%foo%')
+    op = And(
+        PropertyIsEqualTo(PropertyName('int_field'), 13),
+        Or(like, Not(PropertyIsNull('null_field'))),
+        PropertyIsBetween(PropertyName('float_field'), 1, Literal(4) / 2),
+    )
+    assert op.simulate(data) is True
+    assert like._matcher is not None
+
+    copy = pickle.loads(pickle.dumps(op))
+    assert copy.xml() == op.xml()
+    assert copy.conditions is copy.children
+    assert copy.conditions[1].conditions[0]._matcher is None  # Caches are not pickled
+    assert copy.simulate(data) is copy.compile()(data) is True
+
+    copy.conditions[1].conditions[0].pattern = '%baz%'
+    assert copy.simulate(data) is False
+    assert op.simulate(data) is True
+
+
+def test_pickle_Geometry():
+    gml = '<gml:Point><gml:coordinates>45.67,88.56</gml:coordinates></gml:Point>'
+    geom = Geometry(gml)
+    geom.etree()
+    copy = pickle.loads(pickle.dumps(geom))
+    assert copy.source == gml
+    assert not copy._etree and not copy._xml
+
+    op = Intersects('geom', gml)
+    config = SLDConfig()
+    op.xml(config=config)
+    copy = pickle.loads(pickle.dumps(op))
+    assert copy._filter_ogr is None and copy._reprojected == {}
+    assert copy.xml(config=config) == op.xml(config=config)
@@ -0,0 +1,114 @@
+import datetime
+import pytest
+
+from ..ogc import PropertyName, PropertyIsEqualTo, PropertyIsGreaterThan, PropertyIsLike, PropertyIsNull
+from ..ogc.logic_ops import And, Or, Not
+from ..rules import RuleEvaluator, RuleDispatchIndex
+from .utils import outcome
+
+
+class CountingDict(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return super().__getitem__(key)
+
+
+features = [
+    { 'visible': 1, 'class': 3, 'name': 'Main Street', 'lanes': 2 },
+    { 'visible': '1', 'class': 7, 'name': 'tunnel', 'lanes': 4 },
+    { 'visible': 0, 'class': 3, 'name': 'Main Street', 'lanes': 4 },
+    { 'visible': 1, 'class': '7.0', 'name': 'Elm', 'lanes': 1 },
+]
+
+
+def make_rules():
+    # Every rule builds its own (structurally identical) subtrees
+    def visible():
+        return PropertyIsEqualTo(PropertyName('visible'), 1)
+
+    def not_tunnel():
+        return Not(PropertyIsLike('name', '%tunnel%'))
+
+    return [
+        visible() & not_tunnel() & PropertyIsEqualTo(PropertyName('class'), 3),
+        visible() & not_tunnel() & PropertyIsEqualTo(PropertyName('class'), 7),
+        visible() & (PropertyIsEqualTo(PropertyName('class'), 7) | PropertyIsGreaterThan(PropertyName('lanes'), 3)),
+        Not(visible()),
+        PropertyIsNull('class'),
+        None,
+    ]
+
+
+def test_RuleEvaluator():
+    rules = make_rules()
+    evaluator = RuleEvaluator(rules)
+    assert evaluator.shared_count == 3  # visible, not_tunnel and the equality on class 7
+
+    for feature in features:
+        expected = [True if rule is None else rule.compile()(feature) for rule in rules]
+        assert evaluator.evaluate(feature) == expected
+        assert evaluator.matching(feature) == [i for i, result in enumerate(expected) if result is True]
+
+    # Shared subtrees are evaluated once per feature
+    feature = CountingDict(features[0])
+    evaluator.evaluate(feature)
+    assert feature.reads == 6
+    assert RuleEvaluator([]).evaluate(feature) == []
+
+
+
+def test_RuleEvaluator_equalities():
+    # An Or of equalities on one property is looked up in an EqualityIndex, like with Or.compile()
+    categories = Or(*[PropertyIsEqualTo(PropertyName('code'), i) for i in range(300)])
+    evaluator = RuleEvaluator([categories, categories & PropertyIsNull('name')])
+    for value in [299, '7', 7.0, 300, None, True]:
+        expected = categories.simulate({ 'code': value })
+        feature = CountingDict({ 'code': value, 'name': None })
+        assert evaluator.evaluate(feature) == [expected, expected]
+        if value is not True:  # Booleans are compared one by one
+            assert feature.reads == (2 if expected else 1)
+
+
+def test_RuleDispatchIndex():
+    def code(value):
+        return PropertyIsEqualTo(PropertyName('code'), value)
+
+    rules = [code(i) for i in range(300)] + [
+        code('1.0') & PropertyIsLike('name', '%tunnel%'),
+        code('foo') | code(' 7 ') | code('NaN'),
+        PropertyIsGreaterThan(PropertyName('lanes'), 3) & code(2),  # Not indexed: lanes is read first
+        PropertyIsEqualTo(PropertyName('name'), 'Elm'),
+        None,
+    ]
+    index = RuleDispatchIndex(rules)
+    assert index.attribute == 'code'
+    assert index.indexed_count == 302
+
+    evaluator = RuleEvaluator(rules)
+    for value in [1, '1', 1.0, ' 7 ', 'foo', 'bar', 299, 300, None, float('nan'), True, datetime.date(2008, 4, 3)]:
+        feature = { 'code': value, 'name': 'tunnel', 'lanes': 4 }
+        assert outcome(index.evaluate, feature) == outcome(evaluator.evaluate, feature)
+        assert outcome(index.matching, feature) == outcome(evaluator.matching, feature)
+
+    # '1', 1 and 1.0 land in the same bucket, and only its rules are evaluated
+    feature = CountingDict({ 'code': '1', 'name': 'tunnel', 'lanes': 4 })
+    assert index.matching(feature) == [1, 300, 304]
+    assert feature.reads == 7
+    assert index.candidates(feature) == [1, 300, 302, 303, 304]
+
+    # Callers may modify the candidates, even when the value has no bucket
+    feature = { 'code': 'none', 'name': 'tunnel', 'lanes': 4 }
+    candidates = index.candidates(feature)
+    assert candidates == [302, 303, 304]
+    candidates.clear()
+    assert index.candidates(feature) == [302, 303, 304]
+
+    # Features without the attribute raise like without the index
+    with pytest.raises(ValueError):
+        index.evaluate({ 'name': 'Elm' })
+
+    assert RuleDispatchIndex([None, PropertyIsNull('class')]).matching({ 'class': None }) == [0, 1]
@@ -4,7 +4,7 @@ import math
 from pytest import raises, approx
 
 
-from ..utils import parseDouble, stringify, parseDate
+from ..utils import parseDouble, tryParseDouble, stringify, parseDate
 
 
 def test_parseDouble():
@@ -44,6 +44,24 @@ def test_parseDouble():
         parseDouble('42 is the answer')
 
 
+def test_tryParseDouble():
+    assert tryParseDouble(' -3.5E+4  ') == approx(-35000)
+    assert tryParseDouble(13) == 13.0
+    assert type(tryParseDouble(13)) == float
+    assert math.isnan(tryParseDouble(None)) is True
+    assert math.isnan(tryParseDouble(' -NaN ')) is True
+    assert tryParseDouble('-Infinity') == float('-inf')
+
+    # Values which parseDouble rejects give None instead of an exception
+    for value in ['nan', 'inf', 'INF', '1,024', '42 is the answer', '', '  ', True, datetime.date(2014, 6, 15), [1]]:
+        assert tryParseDouble(value) is None
+
+    # Cached results must not leak between similar strings
+    assert tryParseDouble('12') == 12.0
+    assert tryParseDouble(' 12') == 12.0
+    assert tryParseDouble('12a') is None
+
+
 def test_parseDate():
     date = datetime.date(2014, 6, 15)
     dt = parseDate(date)
@@ -80,6 +98,26 @@ def test_parseDate():
     assert (dt.hour, dt.minute, dt.second, dt.microsecond) == (0, 0, 0, 0)
     assert dt.tzinfo is None
 
+    # Shapes outside the fast ISO 8601 path are still understood
+    dt = parseDate('2034-7-3t01:02:03z')
+    assert (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second) == (2034, 7, 3, 1, 2, 3)
+    assert dt.tzinfo is None
+
+    dt = parseDate('15:23:45.5+0100')
+    assert (dt.year, dt.month, dt.day) == (1900, 1, 1)
+    assert (dt.hour, dt.minute, dt.second, dt.microsecond) == (15, 23, 45, 500 * 1000)
+    assert dt.tzinfo.utcoffset(None).total_seconds() == 3600
+
+    # Parsed strings are cached
+    assert parseDate('2011-03-01T15:23:45-01:00') is parseDate('2011-03-01T15:23:45-01:00')
+
+    for illegal in ['2008-02-30', '2008-04-03T24:00:00', '2008-04-03T10:00:00+02:60', '2008-04-03\n', ' 2008-04-03', 'foo']:
+        with raises(ValueError):
+            parseDate(illegal)
+
+    with raises(TypeError):
+        parseDate(20080403)
+
 
 def test_stringify():
     assert stringify('foo') == 'foo'
@@ -4,3 +4,9 @@ def flatten_xml(string):
     return re.sub(r'>\s+<', '><', string.strip())
 
 
+def outcome(func, *args):
+    # The result of func(*args), or the type of the exception it raised
+    try:
+        return func(*args)
+    except Exception as e:
+        return type(e)
@@ -1,4 +1,5 @@
 import datetime
+from functools import lru_cache
 from itertools import product
 import math
 import re
@@ -43,35 +44,149 @@ def parseBool(obj):
     raise ValueError(f'{repr(obj)} cannot be converted to bool')
 
 
-def parseDouble(obj):
-    if type(obj) in [int, float]:
+_NAN_REGEX = re.compile(r'^[+-]?nan$', re.I)
+_JAVA_NAN_REGEX = re.compile(r'^[+-]?NaN$')
+_JAVA_INFINITY_REGEX = re.compile(r'^([+-]|)Infinity$')
+
+
+@lru_cache(maxsize=4096)
+def _parseDoubleString(obj):
+    obj = obj.strip()
+
+    # Fast path: special values (NaN, Infinity, inf, ...) all end with a letter, so anything ending
+    # with a digit is a plain number or no number at all
+    if obj[-1:].isdigit():
+        try:
+            return float(obj)
+        except ValueError:
+            return None
+
+    if _NAN_REGEX.match(obj):
+        if _JAVA_NAN_REGEX.match(obj):
+            return float('nan')
+        return None
+
+    if obj.lower() == 'inf':
+        return None
+
+    match = _JAVA_INFINITY_REGEX.match(obj)
+    if match:
+        return float(match.group(1) + 'inf')
+
+    try:
+        return float(obj)
+    except ValueError:
+        return None
+
+
+def tryParseDouble(obj):
+    # Same as parseDouble() but returns None instead of raising an exception when obj is not a number.
+    # Results for strings are cached since the same values (and Literals) are parsed over and over.
+    if type(obj) in (int, float):
         return float(obj)
 
     if obj is None:
         return float('nan')
 
     if type(obj) == str:
-        obj = obj.strip()
-        if re.match(r'^[+-]?nan$', obj, re.I):
-            if re.match(r'^[+-]?NaN$', obj):
-                return float('nan')
-            raise ValueError(f'Cannot parse {repr(obj)} as number')
-        
-        if obj.lower() == 'inf':
-            raise ValueError(f'Cannot parse {repr(obj)} as number')
-        
-        match = re.match(r'^([+-]|)Infinity$', obj)
-        if match:
-            return float(match.group(1) + 'inf')
+        return _parseDoubleString(obj)
 
-        try:
-            return float(obj)
-        except ValueError:
-            raise ValueError(f'Cannot parse {repr(obj)} as number')
+    return None
+
+
+def parseDouble(obj):
+    number = tryParseDouble(obj)
+    if number is not None:
+        return number
+
+    if type(obj) == str:
+        raise ValueError(f'Cannot parse {repr(obj.strip())} as number')
 
     raise TypeError(f'Cannot parse {repr(obj)} as number')
 
 
+def parseDoubleArray(obj):
+    # parseDouble() for NumPy arrays. Numeric arrays are cast at once, anything else (strings,
+    # objects) is parsed element by element so that the semantics are exactly those of parseDouble().
+    import numpy as np
+
+    if not isinstance(obj, np.ndarray):
+        return parseDouble(obj)
+
+    if obj.dtype.kind in 'iuf':
+        return obj.astype(float)
+
+    return np.array([parseDouble(val) for val in obj.tolist()], dtype=float).reshape(obj.shape)
+
+
+# The ISO 8601 shapes GeoServer produces and accepts: a date, optionally followed by a time with
+# optional milliseconds (or micro) and an optional timezone ('Z', '+HH', '+HHMM' or '+HH:MM')
+_ISO_DATETIME_REGEX = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})'
+    r'(?:T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?(Z|([+-])(\d{2})(?::?([0-5]\d))?)?)?\Z'
+)
+
+
+def _parseIsoDate(time_str):
+    # Single pass parser for the common ISO 8601 shapes. Returns None for anything else, which is
+    # left to the strptime based parser.
+    match = _ISO_DATETIME_REGEX.match(time_str)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second, fraction, tz, sign, tz_hours, tz_minutes = match.groups()
+    try:
+        tzinfo = None
+        if tz is not None and tz != 'Z':
+            # Like strptime(), 'Z' gives a naive datetime and offsets a fixed timezone
+            offset = datetime.timedelta(hours=int(tz_hours), minutes=int(tz_minutes or 0))
+            tzinfo = datetime.timezone(-offset if sign == '-' else offset)
+
+        return datetime.datetime(
+            int(year), int(month), int(day),
+            int(hour or 0), int(minute or 0), int(second or 0), int((fraction or '0').ljust(6, '0')),
+            tzinfo=tzinfo,
+        )
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parseDateString(obj):
+    dt = _parseIsoDate(obj)
+    if dt is not None:
+        return dt
+
+    time_str = obj
+    if re.match(r'.+?[+-]\d{2}:\d{2}$', time_str):
+        # datetime.strftime does not accept colon in timezone (https://bugs.python.org/issue15873) 
+        # whilst GeoServer requires it and datetime.isoformat() includes it
+        time_str = time_str[:-3] + time_str[-2:]
+    elif re.match(r'.+?T.+?[+-]\d{2}$', time_str):
+        # datetime.strftime does not accept hour-only notation for timezones
+        # whilst GeoServer accepts it
+        time_str += '00'
+
+    date_formats = ['%Y-%m-%d', '']
+    time_formats = ['%H:%M:%S', '%H:%M:%S.%f', '']
+    tz_formats = [ '', 'Z', '%z']
+    
+    for fmt_d, fmt_t, fmt_z in product(date_formats, time_formats, tz_formats):
+        format = fmt_d
+        format += 'T' if fmt_d != '' and fmt_t != '' else ''
+        if fmt_t != '':
+            format += fmt_t
+            if fmt_z != '':
+                format += fmt_z
+        try:
+            dt = datetime.datetime.strptime(time_str, format)
+        except ValueError:
+            pass
+        else:
+            return dt
+    raise ValueError(f'{repr(time_str)} cannot be parsed to datetime object')
+
+
 def parseDate(obj):
     if type(obj) == datetime.datetime:
         return obj
@@ -80,34 +195,8 @@ def parseDate(obj):
         return datetime.datetime(year=obj.year, month=obj.month, day=obj.day)
         
     elif type(obj) == str:
-        time_str = obj
-        if re.match(r'.+?[+-]\d{2}:\d{2}$', time_str):
-            # datetime.strftime does not accept colon in timezone (https://bugs.python.org/issue15873) 
-            # whilst GeoServer requires it and datetime.isoformat() includes it
-            time_str = time_str[:-3] + time_str[-2:]
-        elif re.match(r'.+?T.+?[+-]\d{2}$', time_str):
-            # datetime.strftime does not accept hour-only notation for timezones
-            # whilst GeoServer accepts it
-            time_str += '00'
-
-        date_formats = ['%Y-%m-%d', '']
-        time_formats = ['%H:%M:%S', '%H:%M:%S.%f', '']
-        tz_formats = [ '', 'Z', '%z']
-        
-        for fmt_d, fmt_t, fmt_z in product(date_formats, time_formats, tz_formats):
-            format = fmt_d
-            format += 'T' if fmt_d != '' and fmt_t != '' else ''
-            if fmt_t != '':
-                format += fmt_t
-                if fmt_z != '':
-                    format += fmt_z
-            try:
-                dt = datetime.datetime.strptime(time_str, format)
-            except ValueError:
-                pass
-            else:
-                return dt
-        raise ValueError(f'{repr(time_str)} cannot be parsed to datetime object')
+        # Parsed strings are cached as timestamps tend to repeat across features
+        return _parseDateString(obj)
 
     else:
-        raise TypeError(f'{repr(time_str)} cannot be parsed to datetime object')
+        raise TypeError(f'{repr(obj)} cannot be parsed to datetime object')